@@ -0,0 +1,81 @@
+"""Store state vectors, covariances and archetype vectors as binary arrays
+
+Revision ID: binary_state_arrays
+Revises: initial
+
+"""
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'binary_state_arrays'
+down_revision = 'initial'
+branch_labels = None
+depends_on = None
+
+# (table, column, little-endian dtype, nullable); must match models.types.NumpyArray usage
+ARRAY_COLUMNS = [
+    ('sessions', 'state_vector', '<f4', True),
+    ('sessions', 'covariance', '<f4', True),
+    ('archetypes', 'vector', '<f8', False),
+]
+
+BATCH_SIZE = 1000
+
+def _id_type(table_name):
+    if table_name == 'sessions':
+        from sqlalchemy.dialects.postgresql import UUID
+        return UUID(as_uuid=True)
+    return sa.String(50)
+
+def _convert(table_name, column, source_type, target_type, encode):
+    """Copy every value of column into column_new through encode, in batches"""
+    connection = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', _id_type(table_name)),
+        sa.column(column, source_type),
+        sa.column(f'{column}_new', target_type)
+    )
+    update = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam('b_id'))
+        .values({f'{column}_new': sa.bindparam('b_value')})
+    )
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, table.c[column]).where(table.c[column].isnot(None))
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = connection.execute(query.order_by(table.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        connection.execute(update, [{'b_id': row[0], 'b_value': encode(row[1])} for row in rows])
+        last_id = rows[-1][0]
+
+def _swap(table_name, column, new_type, nullable, source_type, encode):
+    op.add_column(table_name, sa.Column(f'{column}_new', new_type, nullable=True))
+    _convert(table_name, column, source_type, new_type, encode)
+    op.drop_column(table_name, column)
+    op.alter_column(table_name, f'{column}_new', new_column_name=column, nullable=nullable)
+
+def upgrade():
+    for table_name, column, dtype, nullable in ARRAY_COLUMNS:
+        _swap(
+            table_name, column, sa.LargeBinary(), nullable, sa.JSON(),
+            lambda value, dtype=dtype: np.asarray(value, dtype=dtype).tobytes()
+        )
+
+def downgrade():
+    for table_name, column, dtype, nullable in ARRAY_COLUMNS:
+        square = column == 'covariance'
+        
+        def decode(raw, dtype=dtype, square=square):
+            array = np.frombuffer(raw, dtype=dtype).astype(np.float64)
+            if square:
+                side = int(round(np.sqrt(array.size)))
+                array = array.reshape(side, side)
+            return array.tolist()
+        
+        _swap(table_name, column, sa.JSON(), nullable, sa.LargeBinary(), decode)
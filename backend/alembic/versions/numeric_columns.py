@@ -0,0 +1,45 @@
+"""Numeric types for difficulty, latency and report confidence
+
+Revision ID: numeric_columns
+Revises: binary_state_arrays
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'numeric_columns'
+down_revision = 'binary_state_arrays'
+branch_labels = None
+depends_on = None
+
+# (table, column, numeric type, USING cast from the old text value)
+NUMERIC_COLUMNS = [
+    ('questions', 'difficulty', sa.Float(), "NULLIF(trim(difficulty), '')::double precision"),
+    ('responses', 'latency_ms', sa.Integer(), "round(NULLIF(trim(latency_ms), '')::numeric)::integer"),
+    ('match_reports', 'confidence', sa.Float(), "NULLIF(trim(confidence), '')::double precision"),
+    ('match_reports', 'average_uncertainty', sa.Float(), "NULLIF(trim(average_uncertainty), '')::double precision"),
+]
+
+def upgrade():
+    # The text default can't be cast in place; swap it for a numeric one
+    op.alter_column('questions', 'difficulty', server_default=None)
+    for table_name, column, numeric_type, using in NUMERIC_COLUMNS:
+        op.alter_column(
+            table_name, column,
+            type_=numeric_type,
+            existing_type=sa.String(),
+            postgresql_using=using
+        )
+    op.alter_column('questions', 'difficulty', server_default=sa.text('1.0'))
+
+def downgrade():
+    op.alter_column('questions', 'difficulty', server_default=None)
+    for table_name, column, numeric_type, _ in NUMERIC_COLUMNS:
+        op.alter_column(
+            table_name, column,
+            type_=sa.String(),
+            existing_type=numeric_type,
+            postgresql_using=f'{column}::text'
+        )
+    op.alter_column('questions', 'difficulty', server_default='1.0')
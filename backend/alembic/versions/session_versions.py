@@ -0,0 +1,35 @@
+"""Session version column and response idempotency keys
+
+Revision ID: session_versions
+Revises: sessions_active_index
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'session_versions'
+down_revision = 'sessions_active_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # A constant server default doesn't rewrite the table on PostgreSQL 11+
+    op.add_column('sessions', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('responses', sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+    
+    # CONCURRENTLY can't run inside a transaction; responses is the largest table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_responses_session_idempotency_key',
+            'responses',
+            ['session_id', 'idempotency_key'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_responses_session_idempotency_key', table_name='responses', postgresql_concurrently=True)
+    op.drop_column('responses', 'idempotency_key')
+    op.drop_column('sessions', 'version')
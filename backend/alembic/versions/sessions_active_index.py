@@ -0,0 +1,29 @@
+"""Partial index on active sessions by status and created_at
+
+Revision ID: sessions_active_index
+Revises: numeric_columns
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'sessions_active_index'
+down_revision = 'numeric_columns'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # CONCURRENTLY can't run inside a transaction; don't lock a large sessions table while building
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sessions_active_created_at',
+            'sessions',
+            ['status', 'created_at'],
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_active_created_at', table_name='sessions', postgresql_concurrently=True)
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import get_read_db
+from models.database import async_engine, async_read_engine, engine, read_engine
+from models.pool import pool_stats
+from core.analytics import latency_by_question, report_confidence
+from core.export import EXPORT_FORMATS, default_until, stream_responses
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+import secrets
+
+bearer = HTTPBearer(auto_error=False)
+
+def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> None:
+    """Admin routes need ``Authorization: Bearer <ADMIN_TOKEN>``; with no token configured they are off"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (ADMIN_TOKEN is not set)")
+    if credentials is None or not secrets.compare_digest(credentials.credentials.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+class QuestionLatency(BaseModel):
+    question_id: str
+    difficulty: float
+    responses: int
+    mean_ms: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+class ReportConfidence(BaseModel):
+    reports: int
+    mean_confidence: Optional[float] = None
+    mean_uncertainty: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+@router.get("/analytics/latency", response_model=list[QuestionLatency])
+async def get_latency_analytics(
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Answer latency percentiles per question, computed in the database"""
+    return await latency_by_question(db, since=since)
+
+@router.get("/analytics/reports", response_model=ReportConfidence)
+async def get_report_analytics(
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Match report confidence distribution, computed in the database"""
+    return await report_confidence(db, since=since)
+
+@router.get("/pool")
+async def get_pool_stats():
+    """Connection pool usage and checkout wait times for the worker that serves this request"""
+    pools = {"sync": engine.pool, "async": async_engine.pool}
+    if read_engine is not None:
+        pools.update({"read_sync": read_engine.pool, "read_async": async_read_engine.pool})
+    return pool_stats(pools)
+
+@router.get("/export/responses")
+async def export_responses(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Stream responses joined with sessions and questions (since <= timestamp < until).
+    
+    ``until`` defaults to a point far enough back that every earlier response
+    is committed and replicated (see ``default_until``). The window end is
+    returned in X-Export-Until; pass it as ``since`` next time for an
+    incremental export.
+    """
+    until = until or default_until()
+    return StreamingResponse(
+        stream_responses(format, since=since, until=until),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "X-Export-Until": until.isoformat(),
+            "Content-Disposition": f'attachment; filename="responses.{format}"'
+        }
+    )
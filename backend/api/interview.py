@@ -0,0 +1,220 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from models import AsyncSessionLocal, Response
+from models.bulk import insert_ignore_statement
+from api.response import (
+    AnswerItem, IDEMPOTENCY_INDEX, QUESTION_LIMIT, advance, apply_and_save, complete_session,
+    load_active_state, lookahead_for, time_limit_reached, unrecorded_answers, write_through
+)
+from api.session import create_session
+from core.question_catalog import QuestionCatalog, question_catalog
+from core.session_store import SessionState, SessionStore, get_session_store
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/interview", tags=["interview"])
+
+# Close codes: policy violation for unusable sessions, internal error otherwise
+CLOSE_SESSION_UNAVAILABLE = 1008
+CLOSE_INTERNAL_ERROR = 1011
+
+class AnswerMessage(BaseModel):
+    # In the order they were answered
+    answers: List[AnswerItem] = Field(min_length=1, max_length=QUESTION_LIMIT)
+
+class ResponseWriter:
+    """Inserts one connection's responses off the answer path.
+    
+    Rows queued while an insert is running go out together in the next one,
+    through a single AsyncSession kept for the life of the connection; it only
+    holds a pooled connection while a batch is being written.
+    
+    Rows are queued after their answers were saved to the session store, so a
+    failed insert leaves the cached state ahead of the database. The session
+    is then evicted, as ``write_through`` does for REST, and the next request
+    recovers it from the responses that did get stored.
+    """
+    
+    def __init__(self, store: SessionStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.error: Optional[Exception] = None
+        self._task = asyncio.create_task(self._run())
+    
+    def raise_if_failed(self) -> None:
+        if self.error is not None:
+            raise RuntimeError("Response writer failed") from self.error
+    
+    def put(self, rows: List[Dict]) -> None:
+        self.raise_if_failed()
+        for row in rows:
+            self.queue.put_nowait(row)
+    
+    async def _run(self) -> None:
+        async with AsyncSessionLocal() as db:
+            while True:
+                rows = [await self.queue.get()]
+                while not self.queue.empty():
+                    rows.append(self.queue.get_nowait())
+                try:
+                    if self.error is None:
+                        await db.execute(insert_ignore_statement(Response, db.bind.dialect.name, IDEMPOTENCY_INDEX), rows)
+                        await db.commit()
+                except Exception as exc:
+                    await db.rollback()
+                    self.error = exc
+                    logger.exception("Writing %d interview responses failed", len(rows))
+                    await self._evict()
+                finally:
+                    for _ in rows:
+                        self.queue.task_done()
+    
+    async def _evict(self) -> None:
+        try:
+            await self.store.evict(self.session_id)
+        except Exception:
+            logger.exception("Evicting session %s after a failed write failed", self.session_id)
+    
+    async def drain(self) -> None:
+        """Wait until everything queued so far is written; raises if a write failed"""
+        await self.queue.join()
+        self.raise_if_failed()
+    
+    async def close(self) -> None:
+        """Write what is queued, then stop; the session is evicted if any of it didn't make it"""
+        try:
+            await self.drain()
+        except BaseException:
+            # A failed write, or the connection task cancelled while rows were still queued
+            self._task.cancel()
+            await asyncio.shield(self._evict())
+            raise
+        self._task.cancel()
+
+async def send_error(websocket: WebSocket, status: int, detail: str) -> None:
+    await websocket.send_json({"type": "error", "status": status, "detail": detail})
+
+async def receive_answers(websocket: WebSocket, catalog: QuestionCatalog) -> List[AnswerItem]:
+    """Next valid answer message; invalid ones get an error reply and are skipped"""
+    while True:
+        try:
+            data = json.loads(await websocket.receive_text())
+            if isinstance(data, dict) and "answers" not in data:
+                data = {"answers": [data]}
+            answers = AnswerMessage.model_validate(data).answers
+        except ValueError:
+            # Malformed JSON or a failed validation
+            await send_error(websocket, 422, "Invalid answer message")
+            continue
+        
+        unknown = [answer.question_id for answer in answers if answer.question_id not in catalog]
+        if unknown:
+            await send_error(websocket, 404, f"Question not found: {', '.join(unknown)}")
+            continue
+        return answers
+
+async def open_interview(store: SessionStore, session_id: Optional[str]):
+    """(state, catalog, current question or None, completion reason) for a new or resumed session"""
+    async with AsyncSessionLocal() as db:
+        if session_id is None:
+            state, catalog, question = await create_session(db, store)
+            return state, catalog, question, None
+        
+        state = await load_active_state(db, store, session_id)
+        catalog = await question_catalog.aget(db)
+    
+    if time_limit_reached(state):
+        return state, catalog, None, "time_limit"
+    if not state.answered_qids:
+        return state, catalog, catalog.next_question(state.covariance, []), None
+    question, reason = advance(catalog, state, state.answered_qids[-1])
+    return state, catalog, question, reason
+
+async def finish_interview(websocket: WebSocket, store: SessionStore, state: SessionState, reason: str) -> None:
+    background_tasks = BackgroundTasks()
+    async with AsyncSessionLocal() as db:
+        if state.status == "completed":
+            # Already saved as completed along with the last answers
+            await write_through(db, store, state, [], background_tasks)
+        else:
+            state = await complete_session(db, store, state, background_tasks)
+    await websocket.send_json({"type": "done", "session_id": state.session_id, "reason": reason})
+    await websocket.close()
+    # Same match report precompute /response schedules after its reply
+    await background_tasks()
+
+@router.websocket("/ws")
+async def interview_socket(
+    websocket: WebSocket,
+    session_id: Optional[str] = Query(None),
+    lookahead: bool = Query(False),
+    store: SessionStore = Depends(get_session_store)
+):
+    """Run a whole interview over one connection.
+    
+    Without ``session_id`` a new session is started; with it, an active session
+    is resumed where it left off. The server sends
+    ``{"type": "question", "session_id", "question", "lookahead"}`` and the
+    client answers with an ``AnswerItem`` object (or ``{"answers": [...]}``).
+    The interview ends with ``{"type": "done", "session_id", "reason"}``;
+    bad messages get ``{"type": "error", "status", "detail"}`` and can be retried.
+    
+    Session state stays in memory for the life of the connection. Responses
+    are inserted by a background writer and the state is saved to the session
+    store after every answer, so a client that loses the socket can reconnect
+    or carry on with ``POST /response`` at any point.
+    """
+    await websocket.accept()
+    try:
+        state, catalog, question, reason = await open_interview(store, session_id)
+    except HTTPException as exc:
+        await send_error(websocket, exc.status_code, exc.detail)
+        await websocket.close(code=CLOSE_SESSION_UNAVAILABLE)
+        return
+    
+    writer = ResponseWriter(store, state.session_id)
+    try:
+        while question is not None:
+            await websocket.send_json({
+                "type": "question",
+                "session_id": state.session_id,
+                "question": question,
+                "lookahead": lookahead_for(catalog, state, question) if lookahead else None
+            })
+            answers = await receive_answers(websocket, catalog)
+            
+            if time_limit_reached(state):
+                reason = "time_limit"
+                break
+            
+            # Don't save more answers to the store once their rows can't be written
+            writer.raise_if_failed()
+            async with AsyncSessionLocal() as db:
+                # Only touches the database for idempotency keys, or to reload after a conflicting REST request
+                answers = await unrecorded_answers(db, state.session_id, answers)
+                state, rows, question, reason = await apply_and_save(db, store, state, catalog, answers)
+            writer.put(rows)
+        
+        # A completed session always has all of its responses stored
+        await writer.drain()
+        await finish_interview(websocket, store, state, reason)
+    except WebSocketDisconnect:
+        # The session stays active; the client can reconnect or fall back to REST
+        pass
+    except HTTPException as exc:
+        # Completed or changed elsewhere (e.g., over REST) in a way this connection can't continue from
+        await send_error(websocket, exc.status_code, exc.detail)
+        await websocket.close(code=CLOSE_SESSION_UNAVAILABLE)
+    except Exception:
+        logger.exception("Interview connection for session %s failed", state.session_id)
+        await websocket.close(code=CLOSE_INTERNAL_ERROR)
+    finally:
+        try:
+            await writer.close()
+        except Exception:
+            logger.warning("Responses for session %s were not all written", state.session_id)
@@ -1,17 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from models import get_db, Session as DBSession, Question, Response
-import re
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import Response as RawResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import get_async_db, Response
+from models.bulk import insert_ignore_statement
+from core.bayesian import GaussianPosterior, normalize_answer
+from core.match_reports import precompute_match_report
+from core.question_catalog import QuestionCatalog, encode_json, question_catalog
+from core.session_store import SessionState, SessionStore, get_session_store
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple, Type
 from datetime import datetime, timedelta
+import uuid
 
 router = APIRouter(prefix="/response", tags=["response"])
 
-class ResponseRequest(BaseModel):
-    session_id: str
+# Sessions complete once this many questions have been answered
+QUESTION_LIMIT = 40
+
+# Compare-and-set attempts before a busy session is answered with 409
+CAS_ATTEMPTS = 3
+
+# Retried submissions carrying an already stored key are inserted as no-ops
+IDEMPOTENCY_INDEX = ("session_id", "idempotency_key")
+
+class AnswerItem(BaseModel):
     question_id: str
     answer: str | int | float
+    latency_ms: Optional[int] = Field(default=None, ge=0)  # Client-measured time to answer
+    # Same key on a retry means the same answer; it is recorded once
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=64)
+
+class ResponseRequest(AnswerItem):
+    session_id: str
+
+class BatchResponseRequest(BaseModel):
+    session_id: str
+    # In the order they were answered
+    answers: List[AnswerItem] = Field(min_length=1, max_length=QUESTION_LIMIT)
 
 class QuestionResponse(BaseModel):
     id: str
@@ -24,100 +51,272 @@ class ResponseResponse(BaseModel):
     done: Optional[bool] = None
     session_id: Optional[str] = None
     reason: Optional[str] = None
+    # Speculative next question per possible answer to `question` (closed-form types only)
+    lookahead: Optional[Dict[str, Optional[QuestionResponse]]] = None
 
-@router.post("", response_model=ResponseResponse)
-async def submit_response(
-    request: ResponseRequest,
-    db: Session = Depends(get_db)
-):
-    """Submit a response and get the next question"""
-    # Get session
+class BatchResponseResponse(ResponseResponse):
+    # Answers recorded; any after the session completed are dropped
+    accepted: int = 0
+
+def question_reply(model: Type[BaseModel], catalog: QuestionCatalog, result: Dict) -> RawResponse:
+    """``result`` rendered exactly as ``model`` would be, with the catalog's pre-rendered question bytes spliced in.
+    
+    Returning a raw response skips response-model validation and JSON encoding
+    of the question payloads, which come straight from the immutable catalog.
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        value = result.get(name, field.default)
+        if name == "question":
+            encoded = catalog.payloads[value["id"]] if value is not None else b"null"
+        elif name == "lookahead":
+            encoded = catalog.encode_lookahead(value)
+        else:
+            encoded = encode_json(value)
+        fields.append(encode_json(name) + b":" + encoded)
+    return RawResponse(b"{" + b",".join(fields) + b"}", media_type="application/json")
+
+async def load_active_state(db: AsyncSession, store: SessionStore, session_id: str) -> SessionState:
+    """Session state for answering, or the matching HTTP error"""
+    # Get session state (Redis, recovered from PostgreSQL on a cache miss)
     try:
-        session = db.query(DBSession).filter(DBSession.id == request.session_id).first()
-    except Exception:
+        session_id = str(uuid.UUID(session_id))
+    except ValueError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if not session:
+    state = await store.load(db, session_id)
+    if not state:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if session.status == "completed":
+    if state.status == "completed":
         raise HTTPException(status_code=400, detail="Session already completed")
+    if state.status != "active":
+        raise HTTPException(status_code=400, detail="Session expired")
+    return state
+
+def time_limit_reached(state: SessionState) -> bool:
+    # 20 minutes by default
+    return state.created_at + timedelta(seconds=settings.session_time_limit) < datetime.utcnow()
+
+def lookahead_for(catalog: QuestionCatalog, state: SessionState, question: Dict) -> Optional[Dict[str, Optional[Dict]]]:
+    """Next question for each possible answer to ``question``, as if it were answered now"""
+    lookahead = catalog.lookahead(state.state_vector, state.covariance, state.answered_qids, question)
+    if lookahead is not None and len(state.answered_qids) + 1 >= QUESTION_LIMIT:
+        # Whatever the answer, it completes the session
+        lookahead = dict.fromkeys(lookahead)
+    return lookahead
+
+def apply_answers(catalog: QuestionCatalog, state: SessionState, answers: List[AnswerItem]) -> List[Dict]:
+    """Fold answers into the session state in order; returns the responses rows to insert.
     
-    # Check time limit (20 minutes)
-    if session.created_at + timedelta(minutes=20) < datetime.utcnow():
-        session.status = "completed"
-        session.completed_at = datetime.utcnow()
-        db.commit()
-        return {
-            "done": True,
-            "session_id": str(session.id),
-            "reason": "time_limit"
-        }
+    Answers past the question limit are not applied. Repeated answers are
+    recorded but don't count twice in the posterior, which is updated in
+    place across the whole list and written back once.
+    """
+    rows = []
+    posterior = None
+    now = datetime.utcnow()
+    for answer in answers:
+        if len(state.answered_qids) >= QUESTION_LIMIT:
+            break
+        question = catalog.get(answer.question_id)
+        normalized_value = normalize_answer(question, answer.answer)
+        rows.append({
+            "session_id": uuid.UUID(state.session_id),
+            "question_id": question["id"],
+            "payload": {
+                "answer": answer.answer,
+                "normalized_value": normalized_value
+            },
+            "latency_ms": answer.latency_ms,
+            "idempotency_key": answer.idempotency_key,
+            # Distinct timestamps keep the answer order recoverable (SessionStore.recover)
+            "timestamp": now + timedelta(microseconds=len(rows))
+        })
+        
+        if question["id"] not in state.answered_qids:
+            state.answered_qids.append(question["id"])
+            if normalized_value is not None:
+                if posterior is None:
+                    posterior = GaussianPosterior.from_state(state.state_vector, state.covariance)
+                h, noise = catalog.selector.measurement(question["id"])
+                posterior.update(h, noise, normalized_value)
     
-    # Get question
-    question = db.query(Question).filter(Question.id == request.question_id).first()
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    if posterior is not None:
+        state.state_vector, state.covariance = posterior.to_arrays()
+    state.updated_at = now
+    return rows
+
+def advance(catalog: QuestionCatalog, state: SessionState, last_answered: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """Next question after an answer, or (None, reason) when the session should complete"""
+    # Check question limit (40 questions)
+    if len(state.answered_qids) >= QUESTION_LIMIT:
+        return None, "question_limit"
     
-    # Save response
-    response = Response(
-        session_id=session.id,
-        question_id=question.id,
-        payload={
-            "answer": request.answer,
-            "normalized_value": None  # Will be computed in Sprint 03
-        }
-    )
-    db.add(response)
+    # Get next question (static: successor of the question just answered; adaptive: highest information gain)
+    next_question = catalog.next_question(state.covariance, state.answered_qids, last_answered=last_answered)
+    if not next_question:
+        # No more questions
+        return None, "no_more_questions"
+    return next_question, None
+
+def mark_completed(state: SessionState) -> None:
+    state.status = "completed"
+    state.completed_at = datetime.utcnow()
+    state.updated_at = state.completed_at
+
+async def unrecorded_answers(db: AsyncSession, session_id: str, answers: List[AnswerItem]) -> List[AnswerItem]:
+    """Answers minus retries: idempotency keys already stored for the session or repeated in the list"""
+    keys = {answer.idempotency_key for answer in answers if answer.idempotency_key}
+    if not keys:
+        return answers
+    # Served by the (session_id, idempotency_key) unique index; no locks taken
+    seen = set((await db.execute(
+        select(Response.idempotency_key)
+        .where(Response.session_id == uuid.UUID(session_id), Response.idempotency_key.in_(keys))
+    )).scalars())
     
-    # Update session - must reassign to trigger SQLAlchemy change detection for JSONB
-    if question.id not in session.answered_qids:
-        session.answered_qids = session.answered_qids + [question.id]  # Creates new list
-    session.updated_at = datetime.utcnow()
+    fresh = []
+    for answer in answers:
+        if answer.idempotency_key:
+            if answer.idempotency_key in seen:
+                continue
+            seen.add(answer.idempotency_key)
+        fresh.append(answer)
+    return fresh
+
+async def apply_and_save(db: AsyncSession, store: SessionStore, state: SessionState, catalog: QuestionCatalog,
+                         answers: List[AnswerItem]) -> Tuple[SessionState, List[Dict], Optional[Dict], Optional[str]]:
+    """Apply answers and compare-and-set the cached state; returns (state, rows, next question, reason).
     
-    # Check question limit (40 questions)
-    if len(session.answered_qids) >= 40:
-        session.status = "completed"
-        session.completed_at = datetime.utcnow()
-        db.commit()
+    If another request changed the session since it was read, the answers are
+    re-applied to its fresh state, so concurrent submissions can neither drop
+    an answer nor overshoot the question limit. A completing session is saved
+    as completed here; the caller writes it through with ``write_through``.
+    """
+    for _ in range(CAS_ATTEMPTS):
+        rows = apply_answers(catalog, state, answers)
+        next_question, reason = advance(catalog, state, rows[-1]["question_id"] if rows else None)
+        if next_question is None:
+            mark_completed(state)
+        if await store.save(state, dirty=next_question is not None):
+            return state, rows, next_question, reason
+        state = await load_active_state(db, store, state.session_id)
+    raise HTTPException(status_code=409, detail="Session is being updated concurrently, please retry")
+
+async def write_through(db: AsyncSession, store: SessionStore, state: SessionState, rows: List[Dict],
+                        background_tasks: BackgroundTasks) -> None:
+    """Insert responses (plus the final state of a completed session) after a successful save"""
+    try:
+        # Append-only insert; the sessions row of an active session is written behind
+        if rows:
+            await db.execute(insert_ignore_statement(Response, db.bind.dialect.name, IDEMPOTENCY_INDEX), rows)
+        if state.status == "completed":
+            await store.flush(db, [state])
+        await db.commit()
+    except Exception:
+        # The cache is now ahead of the database; drop it so the next request recovers from PostgreSQL
+        await store.evict(state.session_id)
+        raise
+    
+    if state.status == "completed":
+        # Computed after the response is sent, so the results page usually finds it ready
+        background_tasks.add_task(precompute_match_report, state.session_id)
+
+async def record_answers(db: AsyncSession, store: SessionStore, state: SessionState, catalog: QuestionCatalog,
+                         answers: List[AnswerItem], background_tasks: BackgroundTasks,
+                         lookahead: bool = False) -> Dict:
+    """Apply answers, insert their responses in one statement and move the interview on.
+    
+    Retried answers (idempotency key already stored) are skipped. The cached
+    state is swapped in before anything is committed, so the loser of a race
+    re-applies its answers on top of the winner's instead of overwriting them.
+    """
+    answers = await unrecorded_answers(db, state.session_id, answers)
+    state, rows, next_question, reason = await apply_and_save(db, store, state, catalog, answers)
+    await write_through(db, store, state, rows, background_tasks)
+    result = {"accepted": len(rows)}
+    
+    if next_question is None:
         return {
+            **result,
             "done": True,
-            "session_id": str(session.id),
-            "reason": "question_limit"
+            "session_id": state.session_id,
+            "reason": reason
         }
     
-    # Get next question (static flow - sequential, ordered by numeric part of ID)
-    # Extract numeric part from ID (e.g., "qid_1" -> 1) for proper ordering
-    all_questions = db.query(Question).all()
-    # Sort by extracting numeric part from ID
-    all_questions.sort(key=lambda q: int(re.search(r'\d+', q.id).group()) if re.search(r'\d+', q.id) else 999)
-    answered_ids = set(session.answered_qids)
-    next_question = None
-    
-    for q in all_questions:
-        if q.id not in answered_ids:
-            next_question = q
-            break
+    if lookahead:
+        result["lookahead"] = lookahead_for(catalog, state, next_question)
+    return {
+        **result,
+        "question": next_question
+    }
+
+@router.post("", response_model=ResponseResponse)
+async def submit_response(
+    request: ResponseRequest,
+    background_tasks: BackgroundTasks,
+    lookahead: bool = Query(False, description="Also return the next question for each possible answer"),
+    db: AsyncSession = Depends(get_async_db),
+    store: SessionStore = Depends(get_session_store)
+):
+    """Submit a response and get the next question"""
+    state = await load_active_state(db, store, request.session_id)
     
-    if not next_question:
-        # No more questions
-        session.status = "completed"
-        session.completed_at = datetime.utcnow()
-        db.commit()
+    if time_limit_reached(state):
+        await complete_session(db, store, state, background_tasks)
         return {
             "done": True,
-            "session_id": str(session.id),
-            "reason": "no_more_questions"
+            "session_id": state.session_id,
+            "reason": "time_limit"
         }
     
-    db.commit()
+    # Get question from the cached catalog
+    catalog = await question_catalog.aget(db)
+    if request.question_id not in catalog:
+        raise HTTPException(status_code=404, detail="Question not found")
     
-    return {
-        "question": {
-            "id": next_question.id,
-            "text": next_question.text,
-            "type": next_question.type,
-            "options": next_question.options
+    result = await record_answers(db, store, state, catalog, [request], background_tasks, lookahead=lookahead)
+    return question_reply(ResponseResponse, catalog, result)
+
+@router.post("/batch", response_model=BatchResponseResponse)
+async def submit_responses(
+    request: BatchResponseRequest,
+    background_tasks: BackgroundTasks,
+    lookahead: bool = Query(False, description="Also return the next question for each possible answer"),
+    db: AsyncSession = Depends(get_async_db),
+    store: SessionStore = Depends(get_session_store)
+):
+    """Submit several queued answers at once (one insert, one commit) and get the next question.
+    
+    Answers are applied in list order, exactly as if submitted one by one.
+    The batch is rejected as a whole if any question is unknown.
+    """
+    state = await load_active_state(db, store, request.session_id)
+    
+    if time_limit_reached(state):
+        await complete_session(db, store, state, background_tasks)
+        return {
+            "done": True,
+            "session_id": state.session_id,
+            "reason": "time_limit"
         }
-    }
+    
+    catalog = await question_catalog.aget(db)
+    unknown = [answer.question_id for answer in request.answers if answer.question_id not in catalog]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Question not found: {', '.join(unknown)}")
+    
+    result = await record_answers(db, store, state, catalog, request.answers, background_tasks, lookahead=lookahead)
+    return question_reply(BatchResponseResponse, catalog, result)
 
+async def complete_session(db: AsyncSession, store: SessionStore, state: SessionState,
+                           background_tasks: BackgroundTasks) -> SessionState:
+    """Mark a session completed, write its final state through and queue its match report"""
+    for _ in range(CAS_ATTEMPTS):
+        mark_completed(state)
+        if await store.save(state, dirty=False):
+            await write_through(db, store, state, [], background_tasks)
+            return state
+        state = await load_active_state(db, store, state.session_id)
+    raise HTTPException(status_code=409, detail="Session is being updated concurrently, please retry")
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from models import get_db, Session as DBSession, MatchReport, Archetype
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import AsyncSessionLocal, get_read_db, Session as DBSession, MatchReport
 from pydantic import BaseModel
 from typing import Optional
-import numpy as np
-from core.matching_engine import compute_cosine_similarity, rank_matches
+import uuid
+from core.match_reports import NoArchetypesAvailable, ensure_match_report
 
 router = APIRouter(prefix="/session", tags=["result"])
 
@@ -22,73 +23,55 @@ class ResultResponse(BaseModel):
     average_uncertainty: Optional[float] = None
     questions_answered: int
 
+async def _load_result(db: AsyncSession, session_uuid: uuid.UUID):
+    session = (await db.execute(select(DBSession).where(DBSession.id == session_uuid))).scalar_one_or_none()
+    if not session or session.status != "completed":
+        return session, None
+    match_report = (await db.execute(
+        select(MatchReport).where(MatchReport.session_id == session.id)
+    )).scalar_one_or_none()
+    return session, match_report
+
 @router.get("/{session_id}/result", response_model=ResultResponse)
 async def get_result(
     session_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get match recommendations for a completed session"""
     # Get session
-    session = db.query(DBSession).filter(DBSession.id == session_id).first()
+    try:
+        session_uuid = uuid.UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Read from the replica; a session that completed moments ago may not be
+    # there yet (or may lack its report), so anything short of a stored report
+    # is re-read from the primary before answering
+    session, match_report = await _load_result(db, session_uuid)
+    if not match_report:
+        async with AsyncSessionLocal() as primary:
+            session, match_report = await _load_result(primary, session_uuid)
+    
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     if session.status != "completed":
         raise HTTPException(status_code=400, detail="Session not completed")
     
-    # Check if match report already exists
-    match_report = db.query(MatchReport).filter(MatchReport.session_id == session.id).first()
-    
-    if match_report:
-        # Return cached results
-        return {
-            "session_id": str(session.id),
-            "recommendations": match_report.recommendations,
-            "confidence": float(match_report.confidence) if match_report.confidence else None,
-            "average_uncertainty": float(match_report.average_uncertainty) if match_report.average_uncertainty else None,
-            "questions_answered": len(session.answered_qids)
-        }
-    
-    # Compute user vector (simple average for MVP - will use Bayesian in Sprint 03)
-    # For now, create a simple vector based on responses
-    # This is a placeholder - in Sprint 03, we'll use the actual state_vector
-    user_vector = np.array([0.5] * 10)  # Default vector
-    
-    # Get all archetypes
-    archetypes = db.query(Archetype).all()
-    
-    if not archetypes:
-        raise HTTPException(status_code=500, detail="No archetypes available")
-    
-    # Compute matches
-    matches = rank_matches(user_vector, archetypes)
-    
-    # Create recommendations
-    recommendations = []
-    for i, match in enumerate(matches[:3], 1):
-        recommendations.append({
-            "rank": i,
-            "archetype_id": match["archetype_id"],
-            "name": match["name"],
-            "fit_score": match["fit_score"],
-            "explanation": match["explanation"]
-        })
-    
-    # Save match report
-    match_report = MatchReport(
-        session_id=session.id,
-        recommendations=recommendations,
-        confidence=None,  # Will be computed in Sprint 03
-        average_uncertainty=None  # Will be computed in Sprint 03
-    )
-    db.add(match_report)
-    db.commit()
+    # Reports are precomputed when the session completes; if that job hasn't
+    # finished yet, join it (or start it) instead of computing a second copy
+    if not match_report:
+        try:
+            match_report = await ensure_match_report(str(session.id))
+        except NoArchetypesAvailable:
+            raise HTTPException(status_code=500, detail="No archetypes available")
+        if not match_report:
+            raise HTTPException(status_code=400, detail="Session not completed")
     
     return {
         "session_id": str(session.id),
-        "recommendations": recommendations,
-        "confidence": None,
-        "average_uncertainty": None,
+        "recommendations": match_report.recommendations,
+        "confidence": match_report.confidence,
+        "average_uncertainty": match_report.average_uncertainty,
         "questions_answered": len(session.answered_qids)
     }
-
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from models import get_db, Session as DBSession, Question, User
-import re
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import get_async_db, Session as DBSession, User
+from api.response import lookahead_for, question_reply
+from core.question_catalog import QuestionCatalog, question_catalog
+from core.session_store import SessionState, SessionStore, get_session_store
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import uuid
 
 router = APIRouter(prefix="/session", tags=["session"])
@@ -17,14 +19,15 @@ class QuestionResponse(BaseModel):
 class SessionStartResponse(BaseModel):
     session_id: str
     question: QuestionResponse
+    # Speculative second question per possible answer to the first (closed-form types only)
+    lookahead: Optional[Dict[str, Optional[QuestionResponse]]] = None
 
-@router.post("/start", response_model=SessionStartResponse)
-async def start_session(db: Session = Depends(get_db)):
-    """Start a new interview session and return the first question"""
+async def create_session(db: AsyncSession, store: SessionStore) -> Tuple[SessionState, QuestionCatalog, Dict]:
+    """Create an anonymous user and interview session; returns its state, the catalog and the first question"""
     # Create a new user (anonymous)
     user = User()
     db.add(user)
-    db.flush()
+    await db.flush()
     
     # Create a new session
     session = DBSession(
@@ -33,27 +36,33 @@ async def start_session(db: Session = Depends(get_db)):
         status="active"
     )
     db.add(session)
-    db.flush()
+    await db.flush()
     
-    # Get first question (static flow - ordered by numeric part of ID)
-    # Extract numeric part from ID (e.g., "qid_1" -> 1) for proper ordering
-    all_questions = db.query(Question).all()
-    # Sort by extracting numeric part from ID
-    all_questions.sort(key=lambda q: int(re.search(r'\d+', q.id).group()) if re.search(r'\d+', q.id) else 999)
-    first_question = all_questions[0] if all_questions else None
+    # Get first question (static flow order or, in adaptive mode, most informative under the prior)
+    catalog = await question_catalog.aget(db)
+    first_question = catalog.next_question(None, [])
     
     if not first_question:
         raise HTTPException(status_code=500, detail="No questions available in database")
     
-    db.commit()
+    await db.commit()
     
-    return {
-        "session_id": str(session.id),
-        "question": {
-            "id": first_question.id,
-            "text": first_question.text,
-            "type": first_question.type,
-            "options": first_question.options
-        }
-    }
+    # Cache the fresh session so /response never has to read the sessions row
+    state = SessionState.from_row(session)
+    await store.add(state)
+    return state, catalog, first_question
 
+@router.post("/start", response_model=SessionStartResponse)
+async def start_session(
+    lookahead: bool = Query(False, description="Also return the next question for each possible answer"),
+    db: AsyncSession = Depends(get_async_db),
+    store: SessionStore = Depends(get_session_store)
+):
+    """Start a new interview session and return the first question"""
+    state, catalog, first_question = await create_session(db, store)
+    
+    return question_reply(SessionStartResponse, catalog, {
+        "session_id": state.session_id,
+        "question": first_question,
+        "lookahead": lookahead_for(catalog, state, first_question) if lookahead else None
+    })
@@ -0,0 +1,54 @@
+"""Aggregate queries that run in the database instead of pulling rows into Python.
+
+Percentiles use ``percentile_cont ... WITHIN GROUP``, which PostgreSQL
+supports; SQLite does not, so these are PostgreSQL-only.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import MatchReport, Question, Response
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+def _percentile_columns(column, percentiles: Sequence[float]) -> List:
+    return [
+        func.percentile_cont(p).within_group(column).label(f"p{round(p * 100):g}")
+        for p in percentiles
+    ]
+
+async def latency_by_question(db: AsyncSession, since: Optional[datetime] = None,
+                              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> List[Dict]:
+    """Answer latency count, mean and percentiles per question, slowest median first"""
+    percentile_columns = _percentile_columns(Response.latency_ms, percentiles)
+    query = (
+        select(
+            Response.question_id,
+            Question.difficulty,
+            func.count(Response.latency_ms).label("responses"),
+            func.avg(Response.latency_ms).label("mean_ms"),
+            *percentile_columns
+        )
+        .join(Question, Question.id == Response.question_id)
+        .where(Response.latency_ms.isnot(None))
+        .group_by(Response.question_id, Question.difficulty)
+        .order_by(percentile_columns[0].desc())
+    )
+    if since is not None:
+        query = query.where(Response.timestamp >= since)
+    return [row._asdict() for row in (await db.execute(query)).all()]
+
+async def report_confidence(db: AsyncSession, since: Optional[datetime] = None,
+                            percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+    """Distribution of match report confidence, plus mean average_uncertainty"""
+    query = select(
+        func.count(MatchReport.id).label("reports"),
+        func.avg(MatchReport.confidence).label("mean_confidence"),
+        func.avg(MatchReport.average_uncertainty).label("mean_uncertainty"),
+        *_percentile_columns(MatchReport.confidence, percentiles)
+    )
+    if since is not None:
+        query = query.where(MatchReport.created_at >= since)
+    return (await db.execute(query)).one()._asdict()
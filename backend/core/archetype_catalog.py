@@ -0,0 +1,142 @@
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+
+from config import settings
+from core.catalog_cache import CatalogCache
+from core.matching_engine import ArchetypeConstraints, IVFIndex, MatchingEngine
+from models import Archetype
+
+logger = logging.getLogger(__name__)
+
+class ArchetypeCatalog:
+    """Immutable in-memory copy of the archetype table used for matching.
+    
+    Vectors live in the engine's float32 matrix; ids, names and the compiled
+    constraint arrays are kept in row order alongside it so a row index from
+    the engine maps straight back to the archetype.
+    """
+    
+    def __init__(self, ids: List[str], names: List[str], vectors: np.ndarray,
+                 min_requirements: List[Dict], contraindications: List[Dict]):
+        self.engine = MatchingEngine(ids, names, vectors)
+        self.ids = self.engine.ids
+        self.names = self.engine.names
+        self.vectors = self.engine.vectors
+        self.row_of = {archetype_id: row for row, archetype_id in enumerate(self.ids)}
+        self.constraints = ArchetypeConstraints(len(ids), min_requirements, contraindications)
+    
+    @classmethod
+    def from_parts(cls, engine: MatchingEngine, constraints: ArchetypeConstraints) -> "ArchetypeCatalog":
+        """Assemble a catalog around an existing engine (e.g. one backed by shared memory)"""
+        catalog = cls.__new__(cls)
+        catalog.engine = engine
+        catalog.ids = engine.ids
+        catalog.names = engine.names
+        catalog.vectors = engine.vectors
+        catalog.row_of = {archetype_id: row for row, archetype_id in enumerate(catalog.ids)}
+        catalog.constraints = constraints
+        return catalog
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def eligible_batch(self, user_vectors: np.ndarray) -> Optional[np.ndarray]:
+        """(B, n) eligibility masks; users excluded from everything fall back to the whole catalog"""
+        if not self.constraints:
+            return None
+        masks = self.constraints.eligible(user_vectors)
+        masks[~masks.any(axis=1)] = True
+        return masks
+    
+    def top_k_batch(self, user_vectors: np.ndarray, k: int) -> tuple:
+        """Exact (rows, scores) top-k of eligible archetypes for B users, as in ``MatchingEngine.top_k_batch``.
+        
+        Eligibility is computed block by block alongside the scores; users
+        excluded from everything are ranked against the whole catalog.
+        """
+        if not self.constraints:
+            return self.engine.top_k_batch(user_vectors, k)
+        rows, scores = self.engine.top_k_batch(
+            user_vectors, k, eligible=lambda start, stop: self.constraints.eligible(user_vectors, start, stop)
+        )
+        if rows.shape[1]:
+            excluded = rows[:, 0] < 0
+            if excluded.any():
+                rows[excluded], scores[excluded] = self.engine.top_k_batch(user_vectors[excluded], k)
+        return rows, scores
+    
+    def eligible(self, user_vector: np.ndarray) -> Optional[np.ndarray]:
+        """Eligibility mask for the user, or None when nothing needs filtering"""
+        if not self.constraints:
+            return None
+        mask = self.constraints.eligible(user_vector)
+        # If the constraints rule out everything, rank the whole catalog rather than return nothing
+        return mask if mask.any() else None
+    
+    def rank(self, user_vector: np.ndarray, k: Optional[int] = None, explain: bool = True,
+             exact: bool = False) -> List[Dict]:
+        """Rank eligible archetypes against a user vector, returning the top k matches"""
+        return self.engine.rank(user_vector, k, mask=self.eligible(user_vector), explain=explain, exact=exact)
+
+def attach_ann_index(catalog: ArchetypeCatalog) -> None:
+    """Give large catalogs an IVF index, reusing the persisted one if it still matches"""
+    engine = catalog.engine
+    if len(engine) < settings.ann_min_catalog_size:
+        return
+    
+    path = Path(settings.ann_index_path) if settings.ann_index_path else None
+    if path is not None and path.exists():
+        try:
+            index = IVFIndex.load(path)
+            index.nprobe = settings.ann_nprobe
+            engine.attach_ann_index(index)
+            return
+        except ValueError:
+            logger.info("Persisted ANN index is stale for the current catalog; rebuilding")
+        except Exception:
+            # Truncated or otherwise unreadable (e.g. zipfile.BadZipFile): rebuilding fixes it
+            logger.warning("Persisted ANN index at %s could not be read; rebuilding", path, exc_info=True)
+    
+    index = engine.build_ann_index(n_lists=settings.ann_n_lists or None)
+    index.nprobe = settings.ann_nprobe
+    if path is not None:
+        try:
+            index.save(path)
+        except OSError:
+            logger.warning("Could not persist ANN index to %s", path, exc_info=True)
+
+def read_archetype_catalog(db: Session) -> ArchetypeCatalog:
+    """Load every archetype in a single column query (no ORM identity map), without an ANN index"""
+    rows = db.query(
+        Archetype.id,
+        Archetype.name,
+        Archetype.vector,
+        Archetype.min_requirements,
+        Archetype.contraindications
+    ).order_by(Archetype.id).all()
+    
+    vectors = np.array([row.vector for row in rows], dtype=np.float64).reshape(len(rows), -1)
+    return ArchetypeCatalog(
+        ids=[row.id for row in rows],
+        names=[row.name for row in rows],
+        vectors=vectors,
+        min_requirements=[row.min_requirements or {} for row in rows],
+        contraindications=[row.contraindications or {} for row in rows]
+    )
+
+def load_archetype_catalog(db: Session) -> ArchetypeCatalog:
+    """Load every archetype, with an ANN index when the catalog is large enough"""
+    catalog = read_archetype_catalog(db)
+    attach_ann_index(catalog)
+    return catalog
+
+# The ANN index is attached in finish() so async callers build it off the event loop
+archetype_catalog: CatalogCache[ArchetypeCatalog] = CatalogCache(
+    Archetype,
+    read_archetype_catalog,
+    refresh_interval=settings.catalog_refresh_interval,
+    finish=attach_ann_index
+)
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+# Parameter space and prior (see DATA_SCHEMA.md: [0.5]*10 with 0.25 standard deviation)
+N_PARAMS = 10
+PRIOR_MEAN = 0.5
+PRIOR_VARIANCE = 0.0625
+
+# Observation noise variance for a difficulty-1.0 question; harder questions
+# are assumed to produce proportionally noisier answers
+BASE_OBSERVATION_NOISE = 0.05
+
+def prior_covariance(n_params: int = N_PARAMS) -> np.ndarray:
+    """Diagonal prior covariance used before the first answer"""
+    return np.eye(n_params, dtype=np.float64) * PRIOR_VARIANCE
+
+def normalize_answer(question: dict, answer) -> Optional[float]:
+    """Map a raw answer onto the 0-1 parameter scale, or None if it carries no signal"""
+    options = question.get("options") or []
+    question_type = question.get("type")
+    
+    if question_type == "multiple_choice":
+        if answer not in options:
+            return None
+        return options.index(answer) / (len(options) - 1) if len(options) > 1 else 0.5
+    
+    if question_type == "likert":
+        try:
+            value = float(answer)
+            low, high = (float(min(options)), float(max(options))) if options else (1.0, 5.0)
+        except (TypeError, ValueError):
+            return None
+        return float(np.clip((value - low) / (high - low), 0.0, 1.0)) if high > low else 0.5
+    
+    if question_type == "slider":
+        try:
+            return float(np.clip(float(answer), 0.0, 1.0))
+        except (TypeError, ValueError):
+            return None
+    
+    # free_text is not scored until the NLP pipeline exists
+    return None
+
+class GaussianPosterior:
+    """Gaussian belief over the parameter vector with Kalman-style updates.
+    
+    Mean and covariance are contiguous float64 arrays updated in place; the
+    only per-update temporaries are two P-length vectors, and the P x P rank-1
+    correction is written into a reusable scratch buffer.
+    """
+    
+    __slots__ = ("mean", "covariance", "_scratch")
+    
+    def __init__(self, mean: np.ndarray, covariance: np.ndarray):
+        self.mean = np.array(mean, dtype=np.float64, order="C")
+        self.covariance = np.array(covariance, dtype=np.float64, order="C")
+        self._scratch = np.empty_like(self.covariance)
+    
+    @classmethod
+    def prior(cls, n_params: int = N_PARAMS) -> "GaussianPosterior":
+        return cls(np.full(n_params, PRIOR_MEAN), prior_covariance(n_params))
+    
+    @classmethod
+    def from_state(cls, state_vector: Optional[Sequence[float]], covariance: Optional[Sequence]) -> "GaussianPosterior":
+        """Posterior from a session's stored state, or the prior if it has none yet"""
+        if state_vector is None or covariance is None:
+            return cls.prior()
+        return cls(state_vector, covariance)
+    
+    def update(self, h: np.ndarray, noise: float, observation: float) -> "GaussianPosterior":
+        """Condition on one answer y = h . theta + e, e ~ N(0, noise)"""
+        sh = self.covariance @ h
+        innovation_variance = float(h @ sh) + noise
+        if innovation_variance <= 0:
+            return self
+        gain = sh / innovation_variance
+        self.mean += gain * (observation - float(h @ self.mean))
+        np.multiply.outer(gain, sh, out=self._scratch)
+        self.covariance -= self._scratch
+        return self
+    
+    def uncertainty(self) -> float:
+        """Average posterior standard deviation relative to the prior (1.0 = nothing learned)"""
+        return average_uncertainty(self.covariance)
+    
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(state_vector, covariance) copies for persistence"""
+        return self.mean.copy(), self.covariance.copy()
+
+def batch_update(means: np.ndarray, covariances: np.ndarray, h: np.ndarray,
+                 noise: np.ndarray, observations: np.ndarray) -> None:
+    """Apply one answer to each of B posteriors in a single stacked operation.
+    
+    Shapes: means (B, P), covariances (B, P, P), h (B, P), noise (B,),
+    observations (B,). Arrays are updated in place; rows with a zero
+    measurement vector are left unchanged.
+    """
+    sh = np.einsum("bpk,bk->bp", covariances, h)
+    innovation_variance = np.einsum("bp,bp->b", h, sh) + noise
+    gain = sh / innovation_variance[:, None]
+    innovation = observations - np.einsum("bp,bp->b", h, means)
+    means += gain * innovation[:, None]
+    covariances -= gain[:, :, None] * sh[:, None, :]
+
+def average_uncertainty(covariance) -> float:
+    """Mean posterior standard deviation divided by the prior standard deviation"""
+    variances = np.clip(np.diagonal(np.asarray(covariance, dtype=np.float64)), 0.0, None)
+    return float(np.mean(np.sqrt(variances)) / np.sqrt(PRIOR_VARIANCE))
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+class CatalogCache(Generic[T]):
+    """Process-wide snapshot of a catalog table, rebuilt only when the table changes.
+    
+    The table watermark is ``(row count, max(updated_at))``: inserts and deletes
+    change the count and ORM edits bump ``updated_at`` through ``onupdate``. The
+    watermark query itself runs at most once per ``refresh_interval`` seconds, so
+    between checks callers get the snapshot without touching the database.
+    
+    Builders take a sync ``Session``; async callers go through ``aget()``, which
+    runs the same builder via ``AsyncSession.run_sync``. That still runs on the
+    event loop thread, so CPU-heavy work that doesn't need the database goes in
+    ``finish``: it is applied to each new snapshot before it is published, in a
+    worker thread for ``aget()``.
+    """
+    
+    def __init__(self, model, build: Callable[[Session], T], refresh_interval: float = 5.0,
+                 finish: Optional[Callable[[T], None]] = None):
+        self.model = model
+        self.build = build
+        self.finish = finish
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[T] = None
+        self._watermark = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # Separate lock for async callers: holding a threading.Lock across the
+        # awaits inside run_sync would block the event loop thread
+        self._async_lock = asyncio.Lock()
+    
+    def watermark(self, db: Session) -> tuple:
+        """Cheap aggregate that changes whenever the catalog table does"""
+        count, last_updated = db.query(func.count(), func.max(self.model.updated_at)).select_from(self.model).one()
+        return count, last_updated
+    
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval
+    
+    def _load(self, db: Session) -> Optional[tuple]:
+        """(unfinished snapshot, watermark) if the table changed since the last build, else None"""
+        watermark = self.watermark(db)
+        if self._snapshot is not None and watermark == self._watermark:
+            self._checked_at = time.monotonic()
+            return None
+        return self.build(db), watermark
+    
+    def _publish(self, snapshot: T, watermark) -> T:
+        self._snapshot = snapshot
+        self._watermark = watermark
+        self._checked_at = time.monotonic()
+        return snapshot
+    
+    def _refresh(self, db: Session) -> T:
+        loaded = self._load(db)
+        if loaded is None:
+            return self._snapshot
+        snapshot, watermark = loaded
+        if self.finish is not None:
+            self.finish(snapshot)
+        return self._publish(snapshot, watermark)
+    
+    def get(self, db: Session) -> T:
+        """Return the current snapshot, reloading it if the watermark moved"""
+        if self._is_fresh():
+            return self._snapshot
+        
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._is_fresh():
+                return self._snapshot
+            return self._refresh(db)
+    
+    async def aget(self, db: AsyncSession) -> T:
+        """Async variant of get() for routes using an AsyncSession"""
+        if self._is_fresh():
+            return self._snapshot
+        
+        async with self._async_lock:
+            if self._is_fresh():
+                return self._snapshot
+            loaded = await db.run_sync(self._load)
+            if loaded is None:
+                return self._snapshot
+            snapshot, watermark = loaded
+            if self.finish is not None:
+                await asyncio.to_thread(self.finish, snapshot)
+            return self._publish(snapshot, watermark)
+    
+    def invalidate(self) -> None:
+        """Force the next get() to re-check the watermark and rebuild"""
+        with self._lock:
+            self._snapshot = None
+            self._watermark = None
+            self._checked_at = 0.0
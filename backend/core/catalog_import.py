@@ -0,0 +1,170 @@
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, TextIO, Type, Union
+
+from pydantic import BaseModel, Field, StrictInt, ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.bayesian import N_PARAMS
+from models import Archetype, Question
+from models.bulk import upsert_statement
+
+class QuestionItem(BaseModel):
+    id: str = Field(max_length=50)
+    text: str
+    type: Literal["multiple_choice", "likert", "slider", "free_text"]
+    # StrictInt first so likert options stay ints (1, not 1.0) on the wire
+    options: Optional[List[Union[StrictInt, float, str]]] = None
+    targets: Optional[List[int]] = None
+    info_weight: Optional[List[float]] = None
+    difficulty: float = Field(default=1.0, gt=0)
+    locale: str = Field(default="en", max_length=10)
+
+class ArchetypeItem(BaseModel):
+    id: str = Field(max_length=50)
+    name: str = Field(max_length=255)
+    vector: List[float] = Field(min_length=N_PARAMS, max_length=N_PARAMS)
+    min_requirements: Optional[Dict[str, float]] = None
+    contraindications: Optional[Dict[str, List[float]]] = None
+    resources: Optional[Dict] = None
+
+@dataclass(frozen=True)
+class ImportKind:
+    model: type
+    item: Type[BaseModel]
+    
+    @property
+    def columns(self) -> List[str]:
+        return [name for name in self.item.model_fields if name != "id"]
+
+IMPORT_KINDS = {
+    "questions": ImportKind(Question, QuestionItem),
+    "archetypes": ImportKind(Archetype, ArchetypeItem),
+}
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    # First few validation failures, as "item N: message"
+    errors: List[str] = field(default_factory=list)
+    
+    MAX_ERRORS = 20
+    
+    def __str__(self) -> str:
+        return (
+            f"{self.inserted} inserted, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.invalid} invalid"
+        )
+
+# Whitespace and the commas between array elements
+_SEPARATORS = re.compile(r"[\s,]*")
+
+def iter_json_array(stream: TextIO, read_size: int = 1 << 16) -> Iterator:
+    """Yield the elements of a top-level JSON array without loading the whole document"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, opened = "", 0, False, False
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer):
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of items")
+                opened, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Usually an element split across reads; only an error at end of input
+                if eof:
+                    raise
+            else:
+                yield item
+                continue
+        elif eof:
+            raise ValueError("Unexpected end of input inside JSON array")
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+def iter_ndjson(stream: TextIO) -> Iterator:
+    """Yield one item per non-empty line"""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_items(path: Path) -> Iterator:
+    """Stream items from a .json array or a .ndjson / .jsonl file"""
+    with open(path, "r") as stream:
+        if path.suffix in (".ndjson", ".jsonl"):
+            yield from iter_ndjson(stream)
+        else:
+            yield from iter_json_array(stream)
+
+def _validate_chunk(kind: ImportKind, raw_items: List, first_index: int, result: ImportResult) -> List[Dict]:
+    """Valid rows of the chunk, deduplicated by id (last wins); failures are recorded"""
+    rows = {}
+    for index, raw in enumerate(raw_items, first_index):
+        try:
+            item = kind.item.model_validate(raw)
+        except ValidationError as error:
+            result.invalid += 1
+            if len(result.errors) < ImportResult.MAX_ERRORS:
+                result.errors.append(f"item {index}: {error.errors()[0]['msg']} at {error.errors()[0]['loc']}")
+            continue
+        # One statement can't upsert the same key twice
+        rows[item.id] = item.model_dump()
+    return list(rows.values())
+
+def import_items(db: Session, kind_name: str, items: Iterable, chunk_size: int = 1000) -> ImportResult:
+    """Validate and upsert items chunk by chunk, one INSERT ... ON CONFLICT per chunk.
+    
+    Rows whose stored values already match are left untouched, so their
+    updated_at (and the catalog caches keyed on it) don't move. Each chunk
+    stamps the rows it changes later than the previous chunk did: a cache
+    reloaded between two commits must still see max(updated_at) move when
+    the next chunk only updates existing rows.
+    """
+    kind = IMPORT_KINDS[kind_name]
+    table = kind.model.__table__
+    result = ImportResult()
+    touched_at = None
+    
+    items = iter(items)
+    first_index = 0
+    while True:
+        raw_items = list(islice(items, chunk_size))
+        if not raw_items:
+            break
+        rows = _validate_chunk(kind, raw_items, first_index, result)
+        first_index += len(raw_items)
+        if not rows:
+            continue
+        
+        ids = [row["id"] for row in rows]
+        existing = set(db.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+        now = datetime.utcnow()
+        touched_at = now if touched_at is None or now > touched_at else touched_at + timedelta(microseconds=1)
+        statement = upsert_statement(
+            kind.model, db.bind.dialect.name, ["id"], kind.columns,
+            only_changed=True, touch={"updated_at": touched_at}
+        ).returning(table.c.id)
+        written = set(db.execute(statement, rows).scalars())
+        db.commit()
+        
+        result.inserted += len(written - existing)
+        result.updated += len(written & existing)
+        result.unchanged += len(rows) - len(written)
+    return result
+
+def import_file(db: Session, kind_name: str, path: Path, chunk_size: int = 1000) -> ImportResult:
+    return import_items(db, kind_name, iter_items(Path(path)), chunk_size=chunk_size)
@@ -0,0 +1,138 @@
+"""Streaming export of responses joined with their sessions and questions.
+
+Rows are read through a server-side cursor in ``yield_per`` batches and
+formatted batch by batch, so memory use is bounded by one batch regardless of
+table size. Exports cover the half-open window ``since <= timestamp < until``;
+passing the previous export's ``until`` as the next ``since`` gives
+incremental exports without overlaps.
+
+Response timestamps are taken before the row is committed (the WebSocket
+writer inserts later still), and exports may read a lagging replica, so the
+newest rows of a window ending at "now" can be invisible to it and would be
+skipped for good. ``default_until()`` ends the window far enough back that
+every earlier response is committed and replicated; windows ending later than
+that can have gaps.
+"""
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Question, Response, Session as DBSession, read_router
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+DEFAULT_YIELD_PER = 5000
+
+# Seconds allowed between a response's timestamp and its commit
+EXPORT_COMMIT_MARGIN = 60
+
+def default_until(now: Optional[datetime] = None) -> datetime:
+    """Latest window end whose responses are all committed and visible on the read replica.
+    
+    The replica serves reads until its lag exceeds ``replica_max_lag``, and lag
+    is only re-checked every ``replica_check_interval`` seconds.
+    """
+    settle = EXPORT_COMMIT_MARGIN
+    if settings.read_database_url:
+        settle += settings.replica_max_lag + settings.replica_check_interval
+    return (now or datetime.utcnow()) - timedelta(seconds=settle)
+
+def export_query(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    query = (
+        select(
+            Response.id.label("response_id"),
+            Response.session_id,
+            DBSession.user_id,
+            DBSession.status.label("session_status"),
+            DBSession.created_at.label("session_created_at"),
+            DBSession.completed_at.label("session_completed_at"),
+            Response.question_id,
+            Question.type.label("question_type"),
+            Question.text.label("question_text"),
+            Response.payload,
+            Response.latency_ms,
+            Response.timestamp
+        )
+        .join(DBSession, DBSession.id == Response.session_id)
+        .join(Question, Question.id == Response.question_id)
+        .order_by(Response.timestamp, Response.id)
+    )
+    if since is not None:
+        query = query.where(Response.timestamp >= since)
+    if until is not None:
+        query = query.where(Response.timestamp < until)
+    return query
+
+EXPORT_COLUMNS = [column.name for column in export_query().selected_columns]
+
+def _plain(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _record(row) -> Dict:
+    return {column: _plain(value) for column, value in zip(EXPORT_COLUMNS, row)}
+
+class ExportFormatter:
+    """Turns batches of rows into text chunks in the chosen format"""
+    
+    def __init__(self, export_format: str):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{export_format}'")
+        self.format = export_format
+    
+    def header(self) -> str:
+        if self.format == "csv":
+            return self._csv_rows([EXPORT_COLUMNS])
+        return ""
+    
+    def batch(self, rows: Iterable) -> str:
+        if self.format == "csv":
+            return self._csv_rows(
+                [_plain(value) if column != "payload" else json.dumps(value)
+                 for column, value in zip(EXPORT_COLUMNS, row)]
+                for row in rows
+            )
+        return "".join(json.dumps(_record(row)) + "\n" for row in rows)
+    
+    @staticmethod
+    def _csv_rows(rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+
+def export_responses(db: Session, export_format: str = "ndjson", since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, yield_per: int = DEFAULT_YIELD_PER) -> Iterator[str]:
+    """Sync export (CLI): text chunks, one per fetched batch"""
+    formatter = ExportFormatter(export_format)
+    yield formatter.header()
+    result = db.execute(export_query(since, until).execution_options(yield_per=yield_per))
+    for partition in result.partitions():
+        yield formatter.batch(partition)
+
+async def stream_responses(export_format: str = "ndjson", since: Optional[datetime] = None,
+                           until: Optional[datetime] = None,
+                           yield_per: int = DEFAULT_YIELD_PER) -> AsyncIterator[str]:
+    """Async export for StreamingResponse.
+    
+    Opens its own (replica, if healthy) session: request-scoped dependencies
+    are closed before a streaming body is sent.
+    """
+    formatter = ExportFormatter(export_format)
+    yield formatter.header()
+    async with (await read_router.sessionmaker())() as db:
+        result = await db.stream(export_query(since, until).execution_options(yield_per=yield_per))
+        async for partition in result.partitions():
+            yield formatter.batch(partition)
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import numpy as np
+
+from core.archetype_catalog import ArchetypeCatalog, archetype_catalog
+from core.bayesian import GaussianPosterior, N_PARAMS, PRIOR_MEAN, average_uncertainty, prior_covariance
+from core.matching_engine import explain_matches_batch
+from models import AsyncSessionLocal, MatchReport, Session as DBSession
+from models.bulk import insert_ignore_statement
+
+logger = logging.getLogger(__name__)
+
+# Number of recommendations stored per report
+TOP_K = 3
+
+# match_reports columns rewritten when a stored report is recomputed
+REPORT_COLUMNS = ("recommendations", "confidence", "average_uncertainty", "created_at")
+
+class NoArchetypesAvailable(Exception):
+    """The archetype catalog is empty, so no report can be computed"""
+
+def build_recommendations(catalog: ArchetypeCatalog, state_vector, covariance) -> Tuple[List[Dict], float, float]:
+    """Top recommendations plus (confidence, average_uncertainty) for one session state"""
+    # User vector is the posterior mean (the prior if no answer carried signal)
+    posterior = GaussianPosterior.from_state(state_vector, covariance)
+    average_uncertainty = posterior.uncertainty()
+    confidence = max(0.0, 1.0 - average_uncertainty)
+    
+    # Only the top k are selected and explained
+    matches = catalog.rank(posterior.mean, k=TOP_K)
+    recommendations = [
+        {
+            "rank": i,
+            "archetype_id": match["archetype_id"],
+            "name": match["name"],
+            "fit_score": match["fit_score"],
+            "explanation": match["explanation"]
+        }
+        for i, match in enumerate(matches, 1)
+    ]
+    return recommendations, confidence, average_uncertainty
+
+def build_recommendations_batch(catalog: ArchetypeCatalog, state_vectors: List, covariances: List) -> List[Tuple[List[Dict], float, float]]:
+    """build_recommendations for B sessions, scored together a block of archetypes at a time"""
+    means = np.array([
+        state_vector if state_vector is not None else np.full(N_PARAMS, PRIOR_MEAN)
+        for state_vector in state_vectors
+    ], dtype=np.float64).reshape(len(state_vectors), -1)
+    prior = prior_covariance()
+    uncertainties = [
+        average_uncertainty(covariance if covariance is not None and state_vector is not None else prior)
+        for state_vector, covariance in zip(state_vectors, covariances)
+    ]
+    
+    rows, scores = catalog.top_k_batch(means, TOP_K)
+    names = [[catalog.names[row] for row in user_rows if row >= 0] for user_rows in rows]
+    explanations = explain_matches_batch(names, means, catalog.vectors[np.maximum(rows, 0)])
+    
+    results = []
+    for user_rows, user_scores, user_explanations, uncertainty in zip(rows, scores, explanations, uncertainties):
+        recommendations = [
+            {
+                "rank": i,
+                "archetype_id": catalog.ids[row],
+                "name": catalog.names[row],
+                "fit_score": float(score),
+                "explanation": explanation
+            }
+            for i, (row, score, explanation) in enumerate(zip(user_rows, user_scores, user_explanations), 1)
+            if row >= 0
+        ]
+        results.append((recommendations, max(0.0, 1.0 - uncertainty), uncertainty))
+    return results
+
+async def _compute_match_report(session_id: str) -> Optional[MatchReport]:
+    async with AsyncSessionLocal() as db:
+        session_uuid = uuid.UUID(session_id)
+        existing = (await db.execute(
+            select(MatchReport).where(MatchReport.session_id == session_uuid)
+        )).scalar_one_or_none()
+        if existing:
+            return existing
+        
+        session = (await db.execute(select(DBSession).where(DBSession.id == session_uuid))).scalar_one_or_none()
+        if not session or session.status != "completed":
+            return None
+        
+        catalog = await archetype_catalog.aget(db)
+        if not len(catalog):
+            raise NoArchetypesAvailable()
+        
+        recommendations, confidence, average_uncertainty = build_recommendations(
+            catalog, session.state_vector, session.covariance
+        )
+        match_report = MatchReport(
+            session_id=session.id,
+            recommendations=recommendations,
+            confidence=confidence,
+            average_uncertainty=average_uncertainty
+        )
+        db.add(match_report)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker stored the report first; theirs wins
+            await db.rollback()
+            match_report = (await db.execute(
+                select(MatchReport).where(MatchReport.session_id == session_uuid)
+            )).scalar_one()
+        return match_report
+
+# Single-flight: at most one computation per session in this process
+_in_flight: Dict[str, asyncio.Task] = {}
+
+async def ensure_match_report(session_id: str) -> Optional[MatchReport]:
+    """Return the session's match report, computing it if needed.
+    
+    Concurrent callers for the same session share one computation; the
+    unique session_id constraint covers races between worker processes.
+    """
+    task = _in_flight.get(session_id)
+    if task is None:
+        task = asyncio.create_task(_compute_match_report(session_id))
+        _in_flight[session_id] = task
+        task.add_done_callback(lambda _: _in_flight.pop(session_id, None))
+    # Shielded so a disconnecting client doesn't cancel work other callers are waiting on
+    return await asyncio.shield(task)
+
+async def precompute_match_report(session_id: str) -> None:
+    """Background job run when a session completes"""
+    try:
+        await ensure_match_report(session_id)
+    except Exception:
+        # The result endpoint will retry on demand
+        logger.exception("Precomputing match report for session %s failed", session_id)
+
+async def precompute_match_reports(session_ids: List[str]) -> int:
+    """Batch variant for sessions completed in bulk: one scoring pass, one insert.
+    
+    Reports that already exist are kept. Returns how many sessions were scored.
+    """
+    if not session_ids:
+        return 0
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(DBSession.id, DBSession.state_vector, DBSession.covariance)
+            .where(DBSession.id.in_([uuid.UUID(session_id) for session_id in session_ids]))
+            .where(DBSession.status == "completed")
+        )).all()
+        catalog = await archetype_catalog.aget(db)
+        if not rows or not len(catalog):
+            return 0
+        
+        results = build_recommendations_batch(
+            catalog,
+            [row.state_vector for row in rows],
+            [row.covariance for row in rows]
+        )
+        await db.execute(
+            insert_ignore_statement(MatchReport, db.bind.dialect.name, ["session_id"]),
+            [
+                {
+                    "session_id": row.id,
+                    "recommendations": recommendations,
+                    "confidence": confidence,
+                    "average_uncertainty": average_uncertainty
+                }
+                for row, (recommendations, confidence, average_uncertainty) in zip(rows, results)
+            ]
+        )
+        await db.commit()
+        return len(rows)
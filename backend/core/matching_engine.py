@@ -1,5 +1,9 @@
+import hashlib
+import os
+import tempfile
 import numpy as np
-from typing import List, Dict
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Sequence, Union
 
 def compute_cosine_similarity(user_vector: np.ndarray, archetype_vector: np.ndarray) -> float:
     """Compute cosine similarity between user vector and archetype vector"""
@@ -13,58 +17,491 @@ def compute_cosine_similarity(user_vector: np.ndarray, archetype_vector: np.ndar
     similarity = dot_product / (norm_user * norm_archetype)
     return float(similarity)
 
+PARAM_NAMES = [
+    "social preference",
+    "physical intensity",
+    "creative drive",
+    "structure preference",
+    "cost sensitivity",
+    "schedule regularity",
+    "learning style",
+    "novelty appetite",
+    "motivation type",
+    "access constraints"
+]
+
+# Parameters closer than this count as a match in explanations
+EXPLANATION_TOLERANCE = 0.2
+
+def closest_parameters(user_vector: np.ndarray, archetype_vectors: np.ndarray, n: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and absolute differences of the n closest parameters per archetype.
+    
+    ``archetype_vectors`` is (k, P) for one user, or (B, k, P) with a (B, P)
+    user batch; results have shape (..., k, n), closest first.
+    """
+    user_vector = np.asarray(user_vector, dtype=np.float64)
+    archetype_vectors = np.asarray(archetype_vectors, dtype=np.float64)
+    differences = np.abs(archetype_vectors - user_vector[..., None, :])
+    n = min(n, differences.shape[-1])
+    if n < differences.shape[-1]:
+        candidates = np.sort(np.argpartition(differences, n - 1, axis=-1)[..., :n], axis=-1)
+    else:
+        candidates = np.broadcast_to(np.arange(n), differences.shape[:-1] + (n,))
+    candidate_differences = np.take_along_axis(differences, candidates, axis=-1)
+    order = np.argsort(candidate_differences, axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1), np.take_along_axis(candidate_differences, order, axis=-1)
+
+def _format_explanations(names: Sequence[str], archetype_vectors: np.ndarray,
+                         indices: np.ndarray, differences: np.ndarray) -> List[str]:
+    explanations = []
+    for name, vector, params, diffs in zip(names, archetype_vectors, indices, differences):
+        matched = [
+            f"{PARAM_NAMES[idx]} ({vector[idx]:.1f})"
+            for idx, diff in zip(params, diffs)
+            if diff < EXPLANATION_TOLERANCE
+        ]
+        if matched:
+            explanations.append(f"Matches {', '.join(matched)}")
+        else:
+            explanations.append(f"Matches your preferences for {name.lower()}")
+    return explanations
+
+def explain_matches(names: Sequence[str], user_vector: np.ndarray, archetype_vectors: np.ndarray) -> List[str]:
+    """Explanations for k archetypes against one user, computed in one vectorized pass"""
+    archetype_vectors = np.asarray(archetype_vectors, dtype=np.float64).reshape(len(names), -1)
+    indices, differences = closest_parameters(user_vector, archetype_vectors)
+    return _format_explanations(names, archetype_vectors, indices, differences)
+
+def explain_matches_batch(names: Sequence[Sequence[str]], user_vectors: np.ndarray,
+                          archetype_vectors: np.ndarray) -> List[List[str]]:
+    """Explanations for B users x k archetypes; closest parameters come from one call"""
+    archetype_vectors = np.asarray(archetype_vectors, dtype=np.float64)
+    indices, differences = closest_parameters(user_vectors, archetype_vectors)
+    return [
+        _format_explanations(row_names, row_vectors, row_indices, row_differences)
+        for row_names, row_vectors, row_indices, row_differences
+        in zip(names, archetype_vectors, indices, differences)
+    ]
+
 def generate_explanation(archetype_name: str, user_vector: np.ndarray, archetype_vector: np.ndarray) -> str:
     """Generate explanation for match (simple version for MVP)"""
-    # Find top 3 matched parameters
-    differences = np.abs(user_vector - archetype_vector)
-    top_indices = np.argsort(differences)[:3]
-    
-    param_names = [
-        "social preference",
-        "physical intensity",
-        "creative drive",
-        "structure preference",
-        "cost sensitivity",
-        "schedule regularity",
-        "learning style",
-        "novelty appetite",
-        "motivation type",
-        "access constraints"
-    ]
+    return explain_matches([archetype_name], user_vector, np.asarray(archetype_vector)[None, :])[0]
+
+class ArchetypeConstraints:
+    """min_requirements and contraindications compiled into flat arrays.
     
-    explanations = []
-    for idx in top_indices:
-        param_name = param_names[idx]
-        user_val = user_vector[idx]
-        arch_val = archetype_vector[idx]
+    Each constraint becomes one (archetype row, parameter, value) triple, so
+    checking the whole catalog against a user vector is a gather, a compare
+    and a scatter into a boolean mask rather than a dict walk per archetype.
+    Contraindications list disallowed values on the 0.1 grid used by the seed
+    data; the user's value is rounded to that grid before comparison.
+    """
+    
+    GRID_STEPS = 10
+    
+    def __init__(self, n_archetypes: int, min_requirements: Sequence[Optional[Dict]],
+                 contraindications: Sequence[Optional[Dict]]):
+        self.n_archetypes = n_archetypes
         
-        if abs(user_val - arch_val) < 0.2:
-            explanations.append(f"{param_name} ({arch_val:.1f})")
+        rows, params, thresholds = [], [], []
+        for row, requirements in enumerate(min_requirements):
+            for param, minimum in (requirements or {}).items():
+                rows.append(row)
+                params.append(int(param))
+                thresholds.append(float(minimum))
+        self.min_rows = np.array(rows, dtype=np.intp)
+        self.min_params = np.array(params, dtype=np.intp)
+        self.min_values = np.array(thresholds, dtype=np.float64)
+        
+        rows, params, bins = [], [], []
+        for row, excluded in enumerate(contraindications):
+            for param, values in (excluded or {}).items():
+                for value in values:
+                    rows.append(row)
+                    params.append(int(param))
+                    bins.append(int(round(float(value) * self.GRID_STEPS)))
+        self.excluded_rows = np.array(rows, dtype=np.intp)
+        self.excluded_params = np.array(params, dtype=np.intp)
+        self.excluded_bins = np.array(bins, dtype=np.int16)
+    
+    def __bool__(self) -> bool:
+        return bool(len(self.min_rows) or len(self.excluded_rows))
     
-    if explanations:
-        return f"Matches {', '.join(explanations)}"
+    def subset(self, rows: Sequence[int]) -> "ArchetypeConstraints":
+        """Constraints of the given catalog rows only, renumbered 0..len(rows)-1 in that order"""
+        rows = np.asarray(rows, dtype=np.intp)
+        position = np.full(self.n_archetypes, -1, dtype=np.intp)
+        position[rows] = np.arange(len(rows))
+        
+        subset = ArchetypeConstraints(len(rows), [], [])
+        keep = position[self.min_rows] >= 0
+        subset.min_rows = position[self.min_rows[keep]]
+        subset.min_params = self.min_params[keep]
+        subset.min_values = self.min_values[keep]
+        keep = position[self.excluded_rows] >= 0
+        subset.excluded_rows = position[self.excluded_rows[keep]]
+        subset.excluded_params = self.excluded_params[keep]
+        subset.excluded_bins = self.excluded_bins[keep]
+        return subset
+    
+    def eligible(self, user_vector: np.ndarray, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Boolean mask over the catalog: True where the user meets every constraint.
+        
+        A (B, P) batch of user vectors gives a (B, n_archetypes) mask. With
+        ``start``/``stop`` only those catalog rows are checked and the mask has
+        ``stop - start`` columns.
+        """
+        stop = self.n_archetypes if stop is None else stop
+        user_vector = np.asarray(user_vector, dtype=np.float64)
+        batch = user_vector.reshape(-1, user_vector.shape[-1])
+        mask = np.ones((batch.shape[0], stop - start), dtype=bool)
+        
+        if len(self.min_rows):
+            keep = (self.min_rows >= start) & (self.min_rows < stop)
+            users, constraints = np.nonzero(batch[:, self.min_params[keep]] < self.min_values[keep])
+            mask[users, self.min_rows[keep][constraints] - start] = False
+        
+        if len(self.excluded_rows):
+            keep = (self.excluded_rows >= start) & (self.excluded_rows < stop)
+            user_bins = np.rint(np.clip(batch, 0.0, 1.0) * self.GRID_STEPS).astype(np.int16)
+            users, constraints = np.nonzero(user_bins[:, self.excluded_params[keep]] == self.excluded_bins[keep])
+            mask[users, self.excluded_rows[keep][constraints] - start] = False
+        
+        return mask if user_vector.ndim > 1 else mask[0]
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    """float32 unit vector (zero stays zero, so it scores 0.0 against everything)"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Row-wise float32 unit vectors (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+def _top_k_rows(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Indices of the k highest finite scores, best first (ties keep index order)"""
+    available = int(np.isfinite(scores).sum())
+    k = available if k is None else min(k, available)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        candidates = _first_k_best(scores[None], k)[0]
     else:
-        return f"Matches your preferences for {archetype_name.lower()}"
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
 
-def rank_matches(user_vector: np.ndarray, archetypes: List) -> List[Dict]:
-    """Rank archetypes by cosine similarity"""
-    matches = []
+def _first_k_best(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of each row's k highest scores, in column order.
+    
+    Of the scores tied with the k-th best, the leftmost ones are taken, so
+    the winners are the same ones a full stable sort would pick.
+    """
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > kth
+    tied = scores == kth
+    tied &= np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)
+    return np.nonzero(above | tied)[1].reshape(scores.shape[0], k)
+
+def _top_k_columns(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise _top_k_rows for a (B, m) matrix: (column indices, scores), both (B, k)"""
+    if k < scores.shape[1]:
+        candidates = _first_k_best(scores, k)
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+class MatchingEngine:
+    """Ranks archetypes against a user vector using one pre-normalized matrix.
+    
+    The catalog is stored as a contiguous float32 matrix whose rows are unit
+    length, so cosine similarity for the whole catalog is a single
+    matrix-vector product. Top-k selection uses ``np.argpartition`` and only
+    sorts the k winners.
+    """
+    
+    # top_k_batch temporaries: roughly 32 bytes per (user, archetype) score in a block
+    # (product, masked copy, merge buffer, partition copy, tie counts), capped at SCORE_BUDGET
+    SCORE_BUDGET = 64 << 20
+    BYTES_PER_SCORE = 32
+    MIN_SCORE_BLOCK = 256
     
-    for archetype in archetypes:
-        archetype_vector = np.array(archetype.vector)
-        fit_score = compute_cosine_similarity(user_vector, archetype_vector)
+    def __init__(self, ids: Sequence[str], names: Sequence[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids) or len(ids) != len(names):
+            raise ValueError("ids, names and vectors must describe the same archetypes")
         
-        explanation = generate_explanation(archetype.name, user_vector, archetype_vector)
+        self.ids = list(ids)
+        self.names = list(names)
+        # Raw float64 vectors are kept for explanations; the normalized float32 copy is used for scoring
+        self.vectors = vectors
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Zero vectors score 0.0 against everything, matching compute_cosine_similarity
+        norms[norms == 0] = 1.0
+        self.normalized = np.ascontiguousarray(vectors / norms, dtype=np.float32)
+        # Optional approximate index for very large catalogs (see IVFIndex)
+        self.ann: Optional["IVFIndex"] = None
+    
+    @classmethod
+    def from_arrays(cls, ids: Sequence[str], names: Sequence[str], vectors: np.ndarray,
+                    normalized: np.ndarray) -> "MatchingEngine":
+        """Adopt prebuilt arrays without copying (e.g. views onto shared memory)"""
+        engine = cls.__new__(cls)
+        engine.ids = list(ids)
+        engine.names = list(names)
+        engine.vectors = vectors
+        engine.normalized = normalized
+        engine.ann = None
+        return engine
+    
+    @classmethod
+    def from_archetypes(cls, archetypes: List) -> "MatchingEngine":
+        """Build an engine from Archetype ORM objects (or anything with id/name/vector)"""
+        ids = [archetype.id for archetype in archetypes]
+        names = [archetype.name for archetype in archetypes]
+        vectors = np.array([archetype.vector for archetype in archetypes], dtype=np.float64)
+        return cls(ids, names, vectors.reshape(len(archetypes), -1))
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def score(self, user_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the user vector against every archetype"""
+        return self.normalized @ _unit(user_vector)
+    
+    def score_batch(self, user_vectors: np.ndarray, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """(B, n) cosine similarities of B users against every archetype, or only ``rows``"""
+        normalized = self.normalized if rows is None else self.normalized[rows]
+        return _unit_rows(user_vectors) @ normalized.T
+    
+    def top_k(self, user_vector: np.ndarray, k: Optional[int] = None,
+              mask: Optional[np.ndarray] = None, exact: bool = False,
+              nprobe: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, scores) of the k best archetypes, best first.
+        
+        ``mask`` restricts the candidates to eligible rows before selection.
+        When an ANN index is attached and k is bounded, only the ``nprobe``
+        closest partitions are scored unless ``exact`` is set.
+        """
+        if self.ann is not None and not exact and k is not None:
+            rows, scores = self.ann.search(self.normalized, _unit(user_vector), k, nprobe=nprobe, mask=mask)
+            # Too few eligible candidates in the probed partitions: fall back to brute force
+            if len(rows) >= k:
+                return rows, scores
         
-        matches.append({
-            "archetype_id": archetype.id,
-            "name": archetype.name,
-            "fit_score": fit_score,
-            "explanation": explanation
-        })
+        scores = self.score(user_vector)
+        if mask is not None:
+            scores = np.where(mask, scores, np.float32(-np.inf))
+        order = _top_k_rows(scores, k)
+        return order, scores[order]
     
-    # Sort by fit_score descending
-    matches.sort(key=lambda x: x["fit_score"], reverse=True)
+    def top_k_batch(self, user_vectors: np.ndarray, k: int, masks: Optional[np.ndarray] = None,
+                    eligible: Optional[Callable[[int, int], np.ndarray]] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Exact top-k for B users, scoring the catalog one block of archetypes at a time.
+        
+        Returns (rows, scores) of shape (B, k), best first. Where fewer than k
+        archetypes are eligible, the missing slots have row -1 and score -inf.
+        Eligibility comes from a (B, n) ``masks`` array or, so that nothing of
+        size B x n is ever built, from ``eligible(start, stop)`` returning the
+        (B, stop - start) mask of one block. Blocks are sized so their
+        temporaries stay within ``SCORE_BUDGET`` bytes, and each block's
+        winners are merged into a running (B, k) top-k.
+        """
+        users = _unit_rows(user_vectors).reshape(-1, self.normalized.shape[1])
+        n_users, n = users.shape[0], self.normalized.shape[0]
+        k = min(k, n)
+        best_rows = np.full((n_users, max(k, 0)), -1, dtype=np.intp)
+        best_scores = np.full((n_users, max(k, 0)), -np.inf, dtype=np.float32)
+        if k <= 0 or not n_users:
+            return best_rows, best_scores
+        
+        block_size = max(self.MIN_SCORE_BLOCK, self.SCORE_BUDGET // (self.BYTES_PER_SCORE * n_users))
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            scores = users @ self.normalized[start:stop].T
+            block_mask = masks[:, start:stop] if masks is not None else eligible(start, stop) if eligible is not None else None
+            if block_mask is not None:
+                scores = np.where(block_mask, scores, np.float32(-np.inf))
+            # Running winners first: on equal scores they have the lower catalog rows
+            positions, best_scores = _top_k_columns(np.hstack([best_scores, scores]), k)
+            best_rows = np.where(
+                positions < k,
+                np.take_along_axis(best_rows, np.minimum(positions, k - 1), axis=1),
+                start + positions - k
+            )
+        best_rows[~np.isfinite(best_scores)] = -1
+        return best_rows, best_scores
     
-    return matches
+    def build_ann_index(self, n_lists: Optional[int] = None, seed: int = 0) -> "IVFIndex":
+        """Build and attach an IVF index over this catalog"""
+        self.ann = IVFIndex.build(self.normalized, n_lists=n_lists, seed=seed, fingerprint=self.fingerprint())
+        return self.ann
+    
+    def attach_ann_index(self, index: "IVFIndex") -> None:
+        if index.fingerprint != self.fingerprint():
+            raise ValueError("ANN index was built for a different archetype catalog")
+        self.ann = index
+    
+    def fingerprint(self) -> str:
+        """Identity of the catalog rows (ids, order and vectors) an index is valid for"""
+        digest = hashlib.sha1()
+        digest.update("\0".join(self.ids).encode())
+        digest.update(self.normalized.tobytes())
+        return digest.hexdigest()
+    
+    def rank(self, user_vector: np.ndarray, k: Optional[int] = None,
+             mask: Optional[np.ndarray] = None, explain: bool = True, exact: bool = False) -> List[Dict]:
+        """Rank archetypes by cosine similarity, returning match dicts for the top k.
+        
+        Explanations are only built for the returned rows, in one batch; pass
+        ``explain=False`` when only ids and scores are needed.
+        """
+        user_vector = np.asarray(user_vector, dtype=np.float64)
+        rows, scores = self.top_k(user_vector, k, mask, exact=exact)
+        
+        matches = [
+            {
+                "archetype_id": self.ids[row],
+                "name": self.names[row],
+                "fit_score": float(fit_score)
+            }
+            for row, fit_score in zip(rows, scores)
+        ]
+        if explain and matches:
+            self.explain(user_vector, rows, matches)
+        
+        return matches
+    
+    def explain(self, user_vector: np.ndarray, rows: np.ndarray, matches: List[Dict]) -> List[Dict]:
+        """Fill in ``explanation`` for already-ranked matches (rows from top_k)"""
+        explanations = explain_matches([match["name"] for match in matches], user_vector, self.vectors[rows])
+        for match, explanation in zip(matches, explanations):
+            match["explanation"] = explanation
+        return matches
 
+class IVFIndex:
+    """Inverted-file (IVF) approximate nearest-neighbour index in pure NumPy.
+    
+    Unit-normalized archetype rows are partitioned with spherical k-means into
+    ``n_lists`` lists. A query scores the centroids, then only the rows of the
+    ``nprobe`` best lists; raising ``nprobe`` trades latency for recall, and
+    ``nprobe == n_lists`` is exact. Rows are stored grouped by list so every
+    probed list is one contiguous slice of ``rows``.
+    """
+    
+    # Rows scored per chunk while assigning, to bound the (chunk x n_lists) temporary
+    ASSIGN_CHUNK = 65536
+    
+    def __init__(self, centroids: np.ndarray, rows: np.ndarray, offsets: np.ndarray,
+                 fingerprint: str = "", nprobe: int = 8):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.rows = np.ascontiguousarray(rows, dtype=np.int64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.fingerprint = fingerprint
+        self.nprobe = nprobe
+    
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+    
+    @classmethod
+    def _assign(cls, normalized: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(normalized.shape[0], dtype=np.int64)
+        for start in range(0, normalized.shape[0], cls.ASSIGN_CHUNK):
+            chunk = normalized[start:start + cls.ASSIGN_CHUNK]
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+    
+    @classmethod
+    def build(cls, normalized: np.ndarray, n_lists: Optional[int] = None, iterations: int = 10,
+              sample_size: Optional[int] = None, seed: int = 0, fingerprint: str = "",
+              nprobe: int = 8) -> "IVFIndex":
+        """Train centroids on a sample of rows, then assign every row to its list"""
+        n = normalized.shape[0]
+        if n == 0:
+            raise ValueError("Cannot build an ANN index over an empty catalog")
+        n_lists = max(1, min(n_lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+        
+        sample_size = min(n, sample_size or 64 * n_lists)
+        sample = normalized[rng.choice(n, size=sample_size, replace=False)] if sample_size < n else normalized
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignments = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty lists from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        
+        assignments = cls._assign(normalized, centroids)
+        rows = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+        return cls(centroids, rows, offsets, fingerprint=fingerprint, nprobe=nprobe)
+    
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Catalog rows in the nprobe lists whose centroids are closest to the query"""
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        if nprobe < self.n_lists:
+            probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probed = np.arange(self.n_lists)
+        return np.concatenate([self.rows[self.offsets[i]:self.offsets[i + 1]] for i in probed])
+    
+    def search(self, normalized: np.ndarray, query: np.ndarray, k: int, nprobe: Optional[int] = None,
+               mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k (rows, cosine scores) for a unit query vector"""
+        candidate_rows = np.sort(self.candidates(query, nprobe))
+        scores = normalized[candidate_rows] @ query
+        if mask is not None:
+            scores = np.where(mask[candidate_rows], scores, np.float32(-np.inf))
+        best = _top_k_rows(scores, k)
+        return candidate_rows[best], scores[best]
+    
+    def recall(self, normalized: np.ndarray, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> float:
+        """Fraction of the exact top-k recovered, averaged over queries (for tuning nprobe)"""
+        hits = 0
+        for query in np.asarray(queries, dtype=np.float32):
+            query = _unit(query)
+            exact = set(_top_k_rows(normalized @ query, k).tolist())
+            approximate = set(self.search(normalized, query, k, nprobe)[0].tolist())
+            hits += len(exact & approximate)
+        return hits / (len(queries) * k) if len(queries) else 1.0
+    
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the index atomically: other workers see the old file or the new one, never part of it"""
+        path = Path(path)
+        # A temp file next to the target keeps os.replace on one filesystem; writing
+        # through the file object also stops numpy appending ".npz" to the name
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, centroids=self.centroids, rows=self.rows, offsets=self.offsets,
+                         fingerprint=np.array(self.fingerprint), nprobe=np.array(self.nprobe))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["rows"], data["offsets"],
+                       fingerprint=str(data["fingerprint"]), nprobe=int(data["nprobe"]))
+
+def rank_matches(user_vector: np.ndarray, archetypes: List, k: Optional[int] = None, explain: bool = True) -> List[Dict]:
+    """Rank archetypes by cosine similarity"""
+    if not archetypes:
+        return []
+    
+    return MatchingEngine.from_archetypes(archetypes).rank(user_vector, k, explain=explain)
@@ -0,0 +1,175 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from core.bayesian import GaussianPosterior, normalize_answer
+from core.catalog_cache import CatalogCache
+from core.question_selector import QuestionSelector
+from models import Question
+
+_QUESTION_NUMBER = re.compile(r'\d+')
+
+# Question types whose possible answers are exactly their options
+LOOKAHEAD_TYPES = ("multiple_choice", "likert")
+
+def encode_json(value) -> bytes:
+    """Compact UTF-8 JSON, byte for byte what FastAPI's JSONResponse renders"""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def question_sort_key(question_id: str) -> int:
+    """Static flow order: numeric part of the ID (e.g., "qid_12" -> 12), unnumbered IDs last"""
+    match = _QUESTION_NUMBER.search(question_id)
+    return int(match.group()) if match else 999
+
+class QuestionCatalog:
+    """Ordered, immutable copy of the question bank for the static flow.
+    
+    Questions are sorted once at load time and each one points at its
+    successor, so finding the next question after an answer is a dictionary
+    hop instead of a sort and a linear scan of the whole bank. The adaptive
+    selector's information matrix is built from the same ordered rows.
+    
+    Each question's wire payload is also rendered to JSON bytes once per load,
+    so the hot endpoints can splice it into their replies without rebuilding
+    and re-encoding it on every request.
+    """
+    
+    def __init__(self, questions: List[Dict]):
+        # sorted() is stable, so IDs with the same number keep their load order
+        ordered = sorted(questions, key=lambda q: question_sort_key(q["id"]))
+        self.order = [q["id"] for q in ordered]
+        self.position = {question_id: i for i, question_id in enumerate(self.order)}
+        self.by_id = {
+            q["id"]: {"id": q["id"], "text": q["text"], "type": q["type"], "options": q["options"]}
+            for q in ordered
+        }
+        self.payloads = {question_id: encode_json(question) for question_id, question in self.by_id.items()}
+        self.successor = {
+            question_id: (self.order[i + 1] if i + 1 < len(self.order) else None)
+            for i, question_id in enumerate(self.order)
+        }
+        self.selector = QuestionSelector(
+            self.order,
+            targets=[q.get("targets") for q in ordered],
+            info_weights=[q.get("info_weight") for q in ordered],
+            difficulties=[q.get("difficulty") or 1.0 for q in ordered]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.order)
+    
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self.by_id
+    
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Question payload (id, text, type, options) by ID"""
+        return self.by_id.get(question_id)
+    
+    def encode_lookahead(self, lookahead: Optional[Dict[str, Optional[Dict]]]) -> bytes:
+        """JSON bytes for a lookahead() map, built from the pre-rendered payloads"""
+        if lookahead is None:
+            return b"null"
+        return b"{" + b",".join(
+            encode_json(key) + b":" + (self.payloads[question["id"]] if question is not None else b"null")
+            for key, question in lookahead.items()
+        ) + b"}"
+    
+    def first(self) -> Optional[Dict]:
+        """First question of the static flow"""
+        return self.by_id[self.order[0]] if self.order else None
+    
+    def next_unanswered(self, answered_qids: Iterable[str], last_answered: Optional[str] = None) -> Optional[Dict]:
+        """First question in order that hasn't been answered yet.
+        
+        In the static flow the answered questions always form a prefix of the
+        order, so the answer is found by following successors from the question
+        that was just answered. If the answered set isn't a prefix (out-of-order
+        submissions, deleted questions) we fall back to walking from the start.
+        """
+        answered = answered_qids if isinstance(answered_qids, (set, frozenset)) else set(answered_qids)
+        
+        if last_answered in self.successor:
+            candidate = self.successor[last_answered]
+            while candidate is not None and candidate in answered:
+                candidate = self.successor[candidate]
+            answered_before = self.position[candidate] if candidate is not None else len(self.order)
+            if answered_before == len(answered):
+                return self.by_id[candidate] if candidate is not None else None
+        
+        for question_id in self.order:
+            if question_id not in answered:
+                return self.by_id[question_id]
+        return None
+    
+    def most_informative(self, covariance, answered_qids: Iterable[str] = ()) -> Optional[Dict]:
+        """Adaptive flow: unanswered question with the highest expected information gain"""
+        question_id = self.selector.select(covariance, answered_qids)
+        return self.by_id[question_id] if question_id is not None else None
+    
+    def next_question(self, covariance, answered_qids: List[str], last_answered: Optional[str] = None) -> Optional[Dict]:
+        """Next question for the configured flow (QUESTION_SELECTION=static|adaptive)"""
+        if settings.question_selection == "adaptive":
+            return self.most_informative(covariance, answered_qids)
+        if last_answered is None and not answered_qids:
+            return self.first()
+        return self.next_unanswered(answered_qids, last_answered=last_answered)
+    
+    def lookahead(self, state_vector, covariance, answered_qids: List[str], question: Dict) -> Optional[Dict[str, Optional[Dict]]]:
+        """Next question for every possible answer to ``question``, keyed by str(option).
+        
+        Only closed-form questions (multiple_choice, likert) have a finite answer
+        set; None is returned for the rest. A None entry means that answer leaves
+        nothing to ask.
+        
+        In the adaptive flow the next question depends on the posterior
+        covariance only, and a Gaussian update's covariance doesn't depend on the
+        value observed: every option that carries signal leads to the same next
+        question, and options that carry none to the one the current covariance
+        picks. That is at most two selections, whatever the number of options.
+        """
+        options = question.get("options")
+        if question["type"] not in LOOKAHEAD_TYPES or not options:
+            return None
+        answered = [*answered_qids, question["id"]]
+        
+        if settings.question_selection != "adaptive":
+            # The static flow's next question doesn't depend on the answer given
+            following = self.next_unanswered(answered, last_answered=question["id"])
+            return {str(option): following for option in options}
+        
+        signal = [normalize_answer(question, option) is not None for option in options]
+        following = {}
+        if any(signal):
+            posterior = GaussianPosterior.from_state(state_vector, covariance)
+            h, noise = self.selector.measurement(question["id"])
+            # Any observation gives the same covariance; the mean isn't used
+            posterior.update(h, noise, 0.0)
+            following[True] = self.selector.select(posterior.covariance, answered)
+        if not all(signal):
+            following[False] = self.selector.select(covariance, answered)
+        return {
+            str(option): self.by_id[following[has_signal]] if following[has_signal] is not None else None
+            for option, has_signal in zip(options, signal)
+        }
+
+def load_question_catalog(db: Session) -> QuestionCatalog:
+    """Load the question bank in a single column query"""
+    rows = db.query(
+        Question.id,
+        Question.text,
+        Question.type,
+        Question.options,
+        Question.targets,
+        Question.info_weight,
+        Question.difficulty
+    ).all()
+    return QuestionCatalog([row._asdict() for row in rows])
+
+question_catalog: CatalogCache[QuestionCatalog] = CatalogCache(
+    Question,
+    load_question_catalog,
+    refresh_interval=settings.catalog_refresh_interval
+)
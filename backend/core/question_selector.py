@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from core.bayesian import BASE_OBSERVATION_NOISE, N_PARAMS, prior_covariance
+
+class QuestionSelector:
+    """Scores every question's expected information gain in one vectorized pass.
+    
+    Each question is a linear-Gaussian measurement of the parameter vector:
+    its row ``h`` in the dense question x parameter information matrix holds
+    ``info_weight`` at the ``targets`` indices, and its observation noise is
+    ``BASE_OBSERVATION_NOISE * difficulty``. For a Gaussian posterior with
+    covariance S, the expected information gain of asking question q is
+    
+        0.5 * log(1 + h_q S h_q^T / r_q)
+    
+    which only depends on the covariance, so the whole bank is scored with one
+    matrix product and a row-wise reduction.
+    """
+    
+    def __init__(self, question_ids: Sequence[str], targets: Sequence[Optional[list]],
+                 info_weights: Sequence[Optional[list]], difficulties: Sequence[float],
+                 n_params: int = N_PARAMS):
+        self.ids = list(question_ids)
+        self.index = {question_id: i for i, question_id in enumerate(self.ids)}
+        self.n_params = n_params
+        
+        info = np.zeros((len(self.ids), n_params), dtype=np.float64)
+        for row, (question_targets, weights) in enumerate(zip(targets, info_weights)):
+            if not question_targets:
+                continue
+            if not weights:
+                weights = [1.0] * len(question_targets)
+            for param, weight in zip(question_targets, weights):
+                if 0 <= int(param) < n_params:
+                    info[row, int(param)] = float(weight)
+        self.info = info
+        
+        difficulties = np.asarray(difficulties, dtype=np.float64).reshape(len(self.ids))
+        self.noise = BASE_OBSERVATION_NOISE * np.where(difficulties > 0, difficulties, 1.0)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def measurement(self, question_id: str) -> Tuple[np.ndarray, float]:
+        """Measurement row h and noise variance r for one question"""
+        row = self.index[question_id]
+        return self.info[row], float(self.noise[row])
+    
+    def answered_mask(self, answered_qids: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(len(self.ids), dtype=bool)
+        rows = [self.index[question_id] for question_id in answered_qids if question_id in self.index]
+        mask[rows] = True
+        return mask
+    
+    def information_gain(self, covariance: np.ndarray) -> np.ndarray:
+        """Expected information gain (nats) of every question.
+        
+        ``covariance`` is (P, P) for one posterior or (B, P, P) for a batch of
+        posteriors, giving gains of shape (Q,) or (B, Q).
+        """
+        covariance = np.asarray(covariance, dtype=np.float64)
+        # h S h^T for every question at once: (…, Q, P) * (Q, P) summed over P
+        predicted_variance = np.einsum("...qp,qp->...q", self.info @ covariance, self.info)
+        return 0.5 * np.log1p(np.maximum(predicted_variance, 0.0) / self.noise)
+    
+    def rank(self, covariance: Optional[np.ndarray], answered_qids: Iterable[str] = (),
+             k: Optional[int] = None) -> List[str]:
+        """Unanswered question IDs ordered by expected information gain"""
+        if covariance is None:
+            covariance = prior_covariance(self.n_params)
+        gains = self.information_gain(covariance)
+        gains[self.answered_mask(answered_qids)] = -np.inf
+        
+        available = int(np.isfinite(gains).sum())
+        k = available if k is None else min(k, available)
+        if k <= 0:
+            return []
+        if k < len(gains):
+            rows = np.argpartition(-gains, k - 1)[:k]
+        else:
+            rows = np.arange(len(gains))
+        # Stable sort on row index first so ties keep the static flow order
+        rows = np.sort(rows)
+        rows = rows[np.argsort(-gains[rows], kind="stable")]
+        return [self.ids[row] for row in rows]
+    
+    def select(self, covariance: Optional[np.ndarray], answered_qids: Iterable[str] = ()) -> Optional[str]:
+        """Unanswered question with the highest expected information gain"""
+        if covariance is None:
+            covariance = prior_covariance(self.n_params)
+        gains = self.information_gain(covariance)
+        gains[self.answered_mask(answered_qids)] = -np.inf
+        if not len(gains):
+            return None
+        # argmax returns the first maximum, so ties keep the static flow order
+        best = int(np.argmax(gains))
+        return self.ids[best] if np.isfinite(gains[best]) else None
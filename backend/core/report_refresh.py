@@ -0,0 +1,124 @@
+import logging
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.archetype_catalog import ArchetypeCatalog, read_archetype_catalog
+from core.bayesian import N_PARAMS, PRIOR_MEAN
+from core.match_reports import REPORT_COLUMNS, TOP_K, build_recommendations_batch
+from models import MatchReport, Session as DBSession
+from models.bulk import upsert_statement
+
+logger = logging.getLogger(__name__)
+
+# Stored fit scores went through float32; don't let rounding hide a tie with the threshold
+SCORE_MARGIN = 1e-6
+
+def stale_reports(catalog: ArchetypeCatalog, changed_ids: Iterable[str], user_vectors: np.ndarray,
+                  stored_ids: Sequence[Sequence[str]], thresholds: np.ndarray) -> np.ndarray:
+    """Which stored reports could differ after the given archetypes changed.
+    
+    Every other archetype's score and eligibility are unchanged, so a stored
+    top-k can only move if a changed archetype was in it (it may leave or
+    reorder), or is now eligible and scores at least the stored k-th fit score
+    (it may enter). Reports ranked under the "nothing is eligible" fallback,
+    or naming archetypes that no longer exist, are always recomputed.
+    
+    ``user_vectors`` is (B, P); ``thresholds`` holds each report's k-th fit
+    score, or -inf when it has fewer than k recommendations.
+    """
+    changed_ids = set(changed_ids)
+    n_users = len(stored_ids)
+    stale = np.zeros(n_users, dtype=bool)
+    
+    stored_rows = np.full((n_users, TOP_K), -1, dtype=np.intp)
+    for user, archetype_ids in enumerate(stored_ids):
+        for slot, archetype_id in enumerate(archetype_ids[:TOP_K]):
+            if archetype_id in changed_ids or archetype_id not in catalog.row_of:
+                stale[user] = True
+            else:
+                stored_rows[user, slot] = catalog.row_of[archetype_id]
+    
+    if catalog.constraints:
+        # Stored archetypes are still eligible unless the report came from the fallback
+        present = stored_rows >= 0
+        rows, columns = np.unique(stored_rows[present], return_inverse=True)
+        if len(rows):
+            eligible = catalog.constraints.subset(rows).eligible(user_vectors)
+            users = np.nonzero(present)[0]
+            stale[users[~eligible[users, columns]]] = True
+    
+    changed_rows = [catalog.row_of[archetype_id] for archetype_id in changed_ids if archetype_id in catalog.row_of]
+    if changed_rows:
+        scores = catalog.engine.score_batch(user_vectors, changed_rows)
+        if catalog.constraints:
+            scores = np.where(catalog.constraints.subset(changed_rows).eligible(user_vectors), scores, -np.inf)
+        # Ineligible archetypes score -inf, which would tie with a short report's -inf threshold
+        stale |= (np.isfinite(scores) & (scores >= (thresholds - SCORE_MARGIN)[:, None])).any(axis=1)
+    return stale
+
+def _report_chunks(db: Session, chunk_size: int):
+    """Completed sessions with a stored report, keyset-paginated by session id"""
+    last_id = None
+    while True:
+        query = (
+            select(DBSession.id, DBSession.state_vector, DBSession.covariance, MatchReport.recommendations)
+            .join(MatchReport, MatchReport.session_id == DBSession.id)
+            .where(DBSession.status == "completed")
+        )
+        if last_id is not None:
+            query = query.where(DBSession.id > last_id)
+        rows = db.execute(query.order_by(DBSession.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
+
+def refresh_reports_for_archetypes(db: Session, changed_ids: Iterable[str], chunk_size: int = 1000) -> Tuple[int, int]:
+    """Recompute only the match reports an archetype edit can affect.
+    
+    Call after the archetype rows have been committed (edits, inserts and
+    deletes are all handled). Returns (reports checked, reports rewritten).
+    """
+    changed_ids = list(changed_ids)
+    catalog = read_archetype_catalog(db)
+    statement = upsert_statement(MatchReport, db.bind.dialect.name, ["session_id"], REPORT_COLUMNS)
+    checked = rewritten = 0
+    
+    for rows in _report_chunks(db, chunk_size):
+        checked += len(rows)
+        user_vectors = np.array([
+            row.state_vector if row.state_vector is not None else np.full(N_PARAMS, PRIOR_MEAN)
+            for row in rows
+        ], dtype=np.float64).reshape(len(rows), -1)
+        stored_ids = [[match["archetype_id"] for match in row.recommendations or []] for row in rows]
+        thresholds = np.array([
+            row.recommendations[TOP_K - 1]["fit_score"] if len(row.recommendations or []) >= TOP_K else -np.inf
+            for row in rows
+        ], dtype=np.float64)
+        
+        stale = np.nonzero(stale_reports(catalog, changed_ids, user_vectors, stored_ids, thresholds))[0]
+        if not len(stale) or not len(catalog):
+            continue
+        
+        results = build_recommendations_batch(
+            catalog,
+            [rows[i].state_vector for i in stale],
+            [rows[i].covariance for i in stale]
+        )
+        db.execute(statement, [
+            {
+                "session_id": rows[i].id,
+                "recommendations": recommendations,
+                "confidence": confidence,
+                "average_uncertainty": average_uncertainty
+            }
+            for i, (recommendations, confidence, average_uncertainty) in zip(stale, results)
+        ])
+        db.commit()
+        rewritten += len(stale)
+    
+    logger.info("Archetype change %s: rewrote %d of %d match reports", changed_ids, rewritten, checked)
+    return checked, rewritten
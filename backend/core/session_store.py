@@ -0,0 +1,364 @@
+import asyncio
+import base64
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import redis.asyncio as redis
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core.bayesian import GaussianPosterior
+from core.question_catalog import question_catalog
+from models import AsyncSessionLocal, Session as DBSession, Response
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "session:dirty"
+
+# Replace a cached state only if it is still at the version the caller read.
+# A missing key is a conflict too: the session was evicted (swept, or failed
+# to persist) and must be reloaded from PostgreSQL rather than resurrected.
+CAS_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current or (cjson.decode(current)['version'] or 0) ~= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+# Same binary encoding as the sessions columns, base64-wrapped for the JSON payload
+STATE_VECTOR_TYPE = DBSession.__table__.c.state_vector.type
+COVARIANCE_TYPE = DBSession.__table__.c.covariance.type
+
+def _encode_array(column_type, value) -> Optional[str]:
+    raw = column_type.encode(value)
+    return base64.b64encode(raw).decode("ascii") if raw is not None else None
+
+def _decode_array(column_type, encoded: Optional[str]) -> Optional[np.ndarray]:
+    return column_type.decode(base64.b64decode(encoded)) if encoded is not None else None
+
+@dataclass
+class SessionState:
+    """Hot interview state for one session, cached in Redis as ``session:{session_id}``"""
+    session_id: str
+    status: str
+    created_at: datetime
+    answered_qids: List[str] = field(default_factory=list)
+    state_vector: Optional[np.ndarray] = None
+    covariance: Optional[np.ndarray] = None
+    completed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 0
+    
+    @classmethod
+    def from_row(cls, session: DBSession) -> "SessionState":
+        return cls(
+            session_id=str(session.id),
+            status=session.status,
+            created_at=session.created_at,
+            answered_qids=list(session.answered_qids or []),
+            state_vector=session.state_vector,
+            covariance=session.covariance,
+            completed_at=session.completed_at,
+            updated_at=session.updated_at,
+            version=session.version or 0
+        )
+    
+    def to_json(self) -> str:
+        return json.dumps({
+            "session_id": self.session_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "answered_qids": self.answered_qids,
+            "state_vector": _encode_array(STATE_VECTOR_TYPE, self.state_vector),
+            "covariance": _encode_array(COVARIANCE_TYPE, self.covariance),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "version": self.version
+        })
+    
+    @classmethod
+    def from_json(cls, raw) -> "SessionState":
+        data = json.loads(raw)
+        for key in ("created_at", "completed_at", "updated_at"):
+            if data[key] is not None:
+                data[key] = datetime.fromisoformat(data[key])
+        data["state_vector"] = _decode_array(STATE_VECTOR_TYPE, data["state_vector"])
+        data["covariance"] = _decode_array(COVARIANCE_TYPE, data["covariance"])
+        return cls(**data)
+    
+    def to_update_params(self, columns) -> Dict:
+        """Bind parameters for the sessions UPDATE issued on flush"""
+        values = {
+            "answered_qids": self.answered_qids,
+            "state_vector": self.state_vector,
+            "covariance": self.covariance,
+            "status": self.status,
+            "completed_at": self.completed_at,
+            "updated_at": self.updated_at or datetime.utcnow(),
+            "version": self.version
+        }
+        params = {f"b_{column}": values[column] for column in columns}
+        params["b_id"] = uuid.UUID(self.session_id)
+        return params
+
+# Columns written when a session completes vs. by the periodic write-behind
+FINAL_COLUMNS = ("answered_qids", "state_vector", "covariance", "status", "completed_at", "updated_at", "version")
+WRITE_BEHIND_COLUMNS = ("answered_qids", "state_vector", "covariance", "updated_at", "version")
+
+def _update_statement(columns, only_active: bool = False):
+    """Executemany-friendly UPDATE of the given sessions columns, keyed by id.
+    
+    Rows already holding a newer version are left alone, so flushes that
+    arrive out of order (two workers, a slow write-behind) can't go backwards.
+    """
+    table = DBSession.__table__
+    criteria = [table.c.id == bindparam("b_id"), table.c.version <= bindparam("b_version")]
+    if only_active:
+        # Never let a late write-behind overwrite a session that has since completed
+        criteria.append(table.c.status == "active")
+    return update(table).where(*criteria).values({column: bindparam(f"b_{column}") for column in columns})
+
+class InMemoryRedis:
+    """In-process stand-in for the handful of Redis commands the session store uses.
+    
+    Selected with ``REDIS_URL=memory://``; meant for local development and
+    offline tests, not for multi-worker deployments.
+    """
+    
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._sets: Dict[str, set] = {}
+    
+    def _alive(self, key: str):
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+    
+    async def get(self, key: str):
+        return self._alive(key)
+    
+    async def mget(self, keys: List[str]):
+        return [self._alive(key) for key in keys]
+    
+    async def set(self, key: str, value, ex: Optional[int] = None, nx: bool = False):
+        if nx and self._alive(key) is not None:
+            return None
+        self._values[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+    
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        """Only the session store's compare-and-set script is supported"""
+        if script != CAS_SCRIPT:
+            raise NotImplementedError("InMemoryRedis only evaluates CAS_SCRIPT")
+        key, value, expected_version, ex = keys_and_args
+        current = self._alive(key)
+        if current is None or json.loads(current).get("version", 0) != int(expected_version):
+            return 0
+        await self.set(key, value, ex=int(ex))
+        return 1
+    
+    async def delete(self, *keys: str):
+        removed = 0
+        for key in keys:
+            removed += self._values.pop(key, None) is not None
+            removed += self._sets.pop(key, None) is not None
+        return removed
+    
+    async def sadd(self, key: str, *members):
+        members_set = self._sets.setdefault(key, set())
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+    
+    async def spop(self, key: str, count: Optional[int] = None):
+        members_set = self._sets.get(key, set())
+        popped = [members_set.pop() for _ in range(min(count or 1, len(members_set)))]
+        return popped if count is not None else (popped[0] if popped else None)
+    
+    async def aclose(self):
+        return None
+
+def create_redis_client(url: str):
+    """Redis client for the configured URL; ``memory://`` selects the in-process stand-in"""
+    if url.startswith("memory://"):
+        return InMemoryRedis()
+    return redis.from_url(url, decode_responses=True)
+
+class SessionStore:
+    """Redis-backed session state with write-behind to PostgreSQL.
+    
+    Reads and answer updates go to Redis only. Every update is a
+    compare-and-set on the state's ``version``, so concurrent requests for one
+    session can't overwrite each other's answers without taking any lock. Updated sessions are added to a
+    dirty set and written to the ``sessions`` table in batches by
+    ``flush_dirty()``; completed sessions are written synchronously through
+    ``flush()`` so results always see the final state. Responses themselves are
+    still inserted per answer, which is what makes recovery possible: on a
+    cache miss the state is rebuilt from the session row plus its responses.
+    """
+    
+    def __init__(self, client, ttl_seconds: int = 86400):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+    
+    @staticmethod
+    def key(session_id: str) -> str:
+        return f"session:{session_id}"
+    
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        """Cached state only, without falling back to the database"""
+        raw = await self.client.get(self.key(session_id))
+        return SessionState.from_json(raw) if raw is not None else None
+    
+    async def get_many(self, session_ids: List[str]) -> List[Optional[SessionState]]:
+        """Cached states for several sessions in one round trip (None where not cached)"""
+        if not session_ids:
+            return []
+        raws = await self.client.mget([self.key(session_id) for session_id in session_ids])
+        return [SessionState.from_json(raw) if raw is not None else None for raw in raws]
+    
+    async def load(self, db: AsyncSession, session_id: str) -> Optional[SessionState]:
+        """Cached state, recovered from PostgreSQL on a miss"""
+        state = await self.get(session_id)
+        if state is None:
+            state = await self.recover(db, session_id)
+        return state
+    
+    async def recover(self, db: AsyncSession, session_id: str) -> Optional[SessionState]:
+        """Rebuild state from the session row and any responses not yet flushed to it.
+        
+        Unflushed responses are replayed in answer order: each question counts
+        once in the posterior, as in ``apply_answers``.
+        """
+        session = (await db.execute(
+            select(DBSession).where(DBSession.id == uuid.UUID(session_id))
+        )).scalar_one_or_none()
+        if session is None:
+            return None
+        
+        state = SessionState.from_row(session)
+        responses = (await db.execute(
+            select(Response.question_id, Response.payload)
+            .where(Response.session_id == session.id)
+            .order_by(Response.timestamp)
+        )).all()
+        posterior = None
+        for question_id, payload in responses:
+            if question_id in state.answered_qids:
+                continue
+            state.answered_qids.append(question_id)
+            normalized_value = (payload or {}).get("normalized_value")
+            if normalized_value is None:
+                continue
+            selector = (await question_catalog.aget(db)).selector
+            if question_id not in selector.index:
+                # Since removed from the question bank
+                continue
+            if posterior is None:
+                posterior = GaussianPosterior.from_state(state.state_vector, state.covariance)
+            h, noise = selector.measurement(question_id)
+            posterior.update(h, noise, normalized_value)
+        
+        if posterior is not None:
+            state.state_vector, state.covariance = posterior.to_arrays()
+        if not await self.add(state, dirty=len(state.answered_qids) != len(session.answered_qids or [])):
+            # Another request recovered it first; theirs may already have moved on
+            state = await self.get(session_id) or state
+        return state
+    
+    async def add(self, state: SessionState, dirty: bool = False) -> bool:
+        """Cache a state that isn't cached yet (new or recovered); False if one already is"""
+        added = await self.client.set(self.key(state.session_id), state.to_json(), ex=self.ttl_seconds, nx=True)
+        if added and dirty and state.status == "active":
+            await self.client.sadd(DIRTY_KEY, state.session_id)
+        return bool(added)
+    
+    async def save(self, state: SessionState, dirty: bool = True) -> bool:
+        """Write state to Redis if it is unchanged since read, and queue it for the next batch flush.
+        
+        On success ``state.version`` is bumped. False means another request
+        changed or evicted the session in the meantime; reload and retry.
+        """
+        state.version += 1
+        saved = await self.client.eval(
+            CAS_SCRIPT, 1, self.key(state.session_id), state.to_json(), state.version - 1, self.ttl_seconds
+        )
+        if not saved:
+            state.version -= 1
+            return False
+        if dirty and state.status == "active":
+            await self.client.sadd(DIRTY_KEY, state.session_id)
+        return True
+    
+    async def flush(self, db: AsyncSession, states: List[SessionState]) -> None:
+        """Write final states to the sessions table in one executemany (caller commits)"""
+        if not states:
+            return
+        await db.execute(
+            _update_statement(FINAL_COLUMNS),
+            [state.to_update_params(FINAL_COLUMNS) for state in states]
+        )
+    
+    async def flush_dirty(self, batch_size: int = 500) -> int:
+        """Flush up to batch_size dirty sessions; returns how many dirty ids were taken"""
+        session_ids = await self.client.spop(DIRTY_KEY, batch_size)
+        if not session_ids:
+            return 0
+        
+        # Completed sessions were already written synchronously
+        states = [
+            state for state in await self.get_many(session_ids)
+            if state is not None and state.status == "active"
+        ]
+        if not states:
+            return len(session_ids)
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    _update_statement(WRITE_BEHIND_COLUMNS, only_active=True),
+                    [state.to_update_params(WRITE_BEHIND_COLUMNS) for state in states]
+                )
+                await db.commit()
+        except Exception:
+            # Put them back so the next round retries
+            await self.client.sadd(DIRTY_KEY, *[state.session_id for state in states])
+            raise
+        return len(session_ids)
+    
+    async def evict(self, *session_ids: str) -> None:
+        if session_ids:
+            await self.client.delete(*[self.key(session_id) for session_id in session_ids])
+
+async def run_write_behind(store: "SessionStore", interval: float) -> None:
+    """Background loop that drains the dirty set every ``interval`` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            while await store.flush_dirty() > 0:
+                pass
+        except Exception:
+            logger.exception("Session write-behind flush failed")
+
+session_store = SessionStore(
+    create_redis_client(settings.redis_url),
+    ttl_seconds=settings.session_cache_ttl
+)
+
+def get_session_store() -> SessionStore:
+    """Dependency for the process-wide session store (override in tests)"""
+    return session_store
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, exists, select, update
+
+from config import settings
+from core.match_reports import precompute_match_reports
+from core.session_store import SessionStore
+from models import AsyncSessionLocal, Response, Session as DBSession
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 500
+
+def _sweep_statement(cutoff: datetime, now: datetime, batch_size: int):
+    """One bulk UPDATE closing up to batch_size expired active sessions, returning (id, new status)"""
+    sessions = DBSession.__table__
+    # Served by the partial index on (status, created_at) WHERE status = 'active'
+    expired = (
+        select(sessions.c.id)
+        .where(sessions.c.status == "active", sessions.c.created_at < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    has_answers = exists().where(Response.__table__.c.session_id == sessions.c.id)
+    return (
+        update(sessions)
+        .where(sessions.c.id.in_(expired), sessions.c.status == "active")
+        .values(
+            status=case((has_answers, "completed"), else_="abandoned"),
+            completed_at=now,
+            updated_at=now
+        )
+        .returning(sessions.c.id, sessions.c.status)
+    )
+
+async def sweep_expired_sessions(store: SessionStore, now: Optional[datetime] = None,
+                                 batch_size: int = SWEEP_BATCH_SIZE) -> Tuple[List[str], List[str]]:
+    """Close one batch of sessions past the time limit; returns (completed ids, abandoned ids).
+    
+    Sessions with at least one response are completed, the rest abandoned.
+    Completed sessions also get their latest cached state written through,
+    since the write-behind may not have flushed their last answers yet.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.session_time_limit + settings.session_sweep_grace)
+    
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(_sweep_statement(cutoff, now, batch_size))).all()
+        completed = [str(session_id) for session_id, status in rows if status == "completed"]
+        abandoned = [str(session_id) for session_id, status in rows if status != "completed"]
+        
+        states = [state for state in await store.get_many(completed) if state is not None]
+        for state in states:
+            state.status = "completed"
+            state.completed_at = state.updated_at = now
+        await store.flush(db, states)
+        await db.commit()
+    
+    # The rows are final now; drop their cached copies
+    await store.evict(*completed, *abandoned)
+    return completed, abandoned
+
+async def run_session_sweeper(store: SessionStore, interval: float) -> None:
+    """Background loop that closes expired sessions every ``interval`` seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            while True:
+                completed, abandoned = await sweep_expired_sessions(store)
+                if completed or abandoned:
+                    logger.info("Swept %d completed and %d abandoned sessions", len(completed), len(abandoned))
+                if settings.session_sweep_precompute and completed:
+                    await precompute_match_reports(completed)
+                if len(completed) + len(abandoned) < SWEEP_BATCH_SIZE:
+                    break
+        except Exception:
+            logger.exception("Session sweep failed")
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import asyncio
+import logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="ORBIT API",
     description="Adaptive Interview & Matching System API",
@@ -30,11 +34,76 @@ async def health():
     return {"status": "healthy"}
 
 # Import routes after app creation
-from api import session, response, result
+from api import session, response, interview, result, admin
 
 app.include_router(session.router)
 app.include_router(response.router)
+app.include_router(interview.router)
 app.include_router(result.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+async def warm_catalogs():
+    """Load the catalogs once so the first requests don't pay for it"""
+    from models import AsyncSessionLocal
+    from core.archetype_catalog import archetype_catalog
+    from core.question_catalog import question_catalog
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            await archetype_catalog.aget(db)
+            await question_catalog.aget(db)
+    except Exception:
+        # Catalogs are loaded lazily on first use if the database isn't ready yet
+        logger.warning("Could not preload catalogs", exc_info=True)
+
+@app.on_event("startup")
+async def start_session_write_behind():
+    """Periodically flush cached session state to PostgreSQL"""
+    from config import settings
+    from core.session_store import session_store, run_write_behind
+    
+    app.state.write_behind = asyncio.create_task(
+        run_write_behind(session_store, settings.session_flush_interval)
+    )
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    """Periodically close sessions that ran past the time limit"""
+    from config import settings
+    from core.session_store import session_store
+    from core.session_sweeper import run_session_sweeper
+    
+    app.state.session_sweeper = None
+    if settings.session_sweep_interval > 0:
+        app.state.session_sweeper = asyncio.create_task(
+            run_session_sweeper(session_store, settings.session_sweep_interval)
+        )
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    if app.state.session_sweeper is not None:
+        app.state.session_sweeper.cancel()
+
+@app.on_event("shutdown")
+async def stop_session_write_behind():
+    from core.session_store import session_store
+    
+    app.state.write_behind.cancel()
+    try:
+        # Final drain so nothing dirty is left only in Redis
+        while await session_store.flush_dirty() > 0:
+            pass
+    except Exception:
+        logger.warning("Final session flush failed; state will be recovered from responses", exc_info=True)
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    from models.database import async_engine, async_read_engine
+    
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
 
 if __name__ == "__main__":
     import uvicorn
@@ -3,6 +3,12 @@ from .database import (
     engine,
     SessionLocal,
     get_db,
+    async_engine,
+    AsyncSessionLocal,
+    get_async_db,
+    read_router,
+    read_sessionmaker,
+    get_read_db,
     User,
     Session,
     Question,
@@ -16,6 +22,12 @@ __all__ = [
     "engine",
     "SessionLocal",
     "get_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
+    "read_router",
+    "read_sessionmaker",
+    "get_read_db",
     "User",
     "Session",
     "Question",
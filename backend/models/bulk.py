@@ -0,0 +1,49 @@
+from typing import Dict, Iterable, Optional, Sequence
+
+from sqlalchemy import JSON, cast, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+# INSERT ... ON CONFLICT is dialect-specific; both dialects we run on share the API
+INSERT_CONSTRUCTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def _is_distinct(column, excluded, dialect_name: str):
+    # PostgreSQL's json type has no equality operator; compare as jsonb
+    if dialect_name == "postgresql" and isinstance(column.type, JSON):
+        return cast(column, postgresql.JSONB).is_distinct_from(cast(excluded, postgresql.JSONB))
+    return column.is_distinct_from(excluded)
+
+def upsert_statement(model, dialect_name: str, index_elements: Sequence[str], update_columns: Iterable[str],
+                     only_changed: bool = False, touch: Optional[Dict] = None):
+    """INSERT ... ON CONFLICT (index_elements) DO UPDATE SET update_columns = EXCLUDED.*
+    
+    With ``only_changed`` the update is skipped for rows whose update_columns
+    already hold the incoming values, so unchanged rows aren't rewritten (and
+    aren't returned by RETURNING). ``touch`` adds fixed values to the SET
+    clause, e.g. ``{"updated_at": now}``, without taking part in that check.
+    
+    The statement has no bound values, so execute it with a list of
+    parameter dicts to send the whole batch as one executemany.
+    """
+    if dialect_name not in INSERT_CONSTRUCTS:
+        raise ValueError(f"No upsert support for database backend '{dialect_name}'")
+    update_columns = list(update_columns)
+    table = model.__table__
+    statement = INSERT_CONSTRUCTS[dialect_name](table)
+    set_ = {column: statement.excluded[column] for column in update_columns}
+    set_.update(touch or {})
+    where = None
+    if only_changed:
+        where = or_(*[
+            _is_distinct(table.c[column], statement.excluded[column], dialect_name)
+            for column in update_columns
+        ])
+    return statement.on_conflict_do_update(index_elements=list(index_elements), set_=set_, where=where)
+
+def insert_ignore_statement(model, dialect_name: str, index_elements: Sequence[str]):
+    """INSERT ... ON CONFLICT (index_elements) DO NOTHING; existing rows win"""
+    if dialect_name not in INSERT_CONSTRUCTS:
+        raise ValueError(f"No upsert support for database backend '{dialect_name}'")
+    return INSERT_CONSTRUCTS[dialect_name](model.__table__).on_conflict_do_nothing(index_elements=list(index_elements))
@@ -1,14 +1,78 @@
-from sqlalchemy import create_engine, Column, String, DateTime, JSON, ForeignKey
+from sqlalchemy import create_engine, Column, String, DateTime, JSON, ForeignKey, Float, Integer, Index, Uuid, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
 
 from config import settings
+from models.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from models.replica import ReplicaRouter, read_sessionmaker_for
+from models.types import NumpyArray
 
-engine = create_engine(settings.database_url)
+# Async drivers for the sync URLs we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Derive the async driver URL from a sync database URL"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def pool_options() -> dict:
+    """Pool sizing from settings, shared by both engines"""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+# Sync engine: scripts, migrations and anything run outside the event loop
+engine = create_engine(settings.database_url, poolclass=InstrumentedQueuePool, **pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: API routes, so queries don't block the event loop
+async_engine = create_async_engine(
+    settings.async_database_url or async_database_url(settings.database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options()
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Read replica (READ_DATABASE_URL): only read-only routes and jobs use it, through the router below
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if settings.read_database_url:
+    read_engine = create_engine(settings.read_database_url, poolclass=InstrumentedQueuePool, **pool_options())
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    async_read_engine = create_async_engine(
+        settings.async_read_database_url or async_database_url(settings.read_database_url),
+        poolclass=InstrumentedAsyncQueuePool,
+        **pool_options()
+    )
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+read_router = ReplicaRouter(
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
+    max_lag=settings.replica_max_lag,
+    check_interval=settings.replica_check_interval
+)
+
+def read_sessionmaker() -> sessionmaker:
+    """Sessionmaker for read-only scripts: the replica unless it is lagging or down"""
+    return read_sessionmaker_for(SessionLocal, ReadSessionLocal, settings.replica_max_lag)
+
 Base = declarative_base()
 
 def get_db():
@@ -19,27 +83,47 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """Dependency for read-only routes: a replica session, or the primary as fallback"""
+    async with (await read_router.sessionmaker())() as db:
+        yield db
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     email = Column(String(255), nullable=True)
 
 class Session(Base):
     __tablename__ = "sessions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
-    state_vector = Column(JSON, nullable=True)  # 10-dim array
-    covariance = Column(JSON, nullable=True)  # 10x10 matrix
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid, ForeignKey("users.id"), nullable=True)
+    state_vector = Column(NumpyArray("<f4"), nullable=True)  # 10-dim float32 array
+    covariance = Column(NumpyArray("<f4", square=True), nullable=True)  # 10x10 float32 matrix
     answered_qids = Column(JSON, default=list, nullable=False)  # Array of question IDs
     status = Column(String(20), default="active", nullable=False)  # active, completed, abandoned
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     completed_at = Column(DateTime, nullable=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped on every state change
     
     user = relationship("User", backref="sessions")
+    
+    __table_args__ = (
+        # Partial: only active sessions, which is what the expiry sweep and status lookups need
+        Index(
+            "ix_sessions_active_created_at", "status", "created_at",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'")
+        ),
+    )
 
 class Question(Base):
     __tablename__ = "questions"
@@ -50,7 +134,7 @@ class Question(Base):
     options = Column(JSON, nullable=True)  # Array of options
     targets = Column(JSON, nullable=True)  # Array of parameter indices (0-9)
     info_weight = Column(JSON, nullable=True)  # Array of weights
-    difficulty = Column(String, default="1.0", nullable=False)
+    difficulty = Column(Float, default=1.0, nullable=False)
     locale = Column(String(10), default="en", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -58,22 +142,28 @@ class Question(Base):
 class Response(Base):
     __tablename__ = "responses"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), nullable=False)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    session_id = Column(Uuid, ForeignKey("sessions.id"), nullable=False)
     question_id = Column(String(50), ForeignKey("questions.id"), nullable=False)
     payload = Column(JSON, nullable=False)  # Answer data
-    latency_ms = Column(String, nullable=True)
+    latency_ms = Column(Integer, nullable=True)  # Time from question shown to answer submitted
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    idempotency_key = Column(String(64), nullable=True)  # Client-chosen, dedupes retried submissions
     
     session = relationship("Session", backref="responses")
     question = relationship("Question", backref="responses")
+    
+    __table_args__ = (
+        # NULL keys never conflict, so submissions without one are unaffected
+        Index("uq_responses_session_idempotency_key", "session_id", "idempotency_key", unique=True),
+    )
 
 class Archetype(Base):
     __tablename__ = "archetypes"
     
     id = Column(String(50), primary_key=True)
     name = Column(String(255), nullable=False)
-    vector = Column(JSON, nullable=False)  # 10-dim array
+    vector = Column(NumpyArray("<f8"), nullable=False)  # 10-dim float64 array
     min_requirements = Column(JSON, nullable=True)  # Object mapping param index to min value
     contraindications = Column(JSON, nullable=True)  # Object mapping param index to disallowed values
     resources = Column(JSON, nullable=True)  # Object with description and links
@@ -83,11 +173,11 @@ class Archetype(Base):
 class MatchReport(Base):
     __tablename__ = "match_reports"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), nullable=False, unique=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    session_id = Column(Uuid, ForeignKey("sessions.id"), nullable=False, unique=True)
     recommendations = Column(JSON, nullable=False)  # Array of match objects
-    confidence = Column(String, nullable=True)  # 0-1 float
-    average_uncertainty = Column(String, nullable=True)  # 0-1 float
+    confidence = Column(Float, nullable=True)  # 0-1
+    average_uncertainty = Column(Float, nullable=True)  # 0-1
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     session = relationship("Session", backref="match_report", uselist=False)
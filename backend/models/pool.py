@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+class PoolMetrics:
+    """Checkout timing counters for one pool (this process only)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connect_seconds = 0.0
+    
+    def record_checkout(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+    
+    def record_connect(self, seconds: float) -> None:
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_seconds += seconds
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_seconds_total": self.checkout_seconds,
+                "checkout_seconds_mean": self.checkout_seconds / attempts if attempts else 0.0,
+                "checkout_seconds_max": self.max_checkout_seconds,
+                # Checkout time not spent opening new connections, i.e. queued for a free one
+                "wait_seconds_total": max(0.0, self.checkout_seconds - self.connect_seconds),
+                "connections_opened": self.connections_opened,
+                "connect_seconds_total": self.connect_seconds
+            }
+
+class InstrumentedPoolMixin:
+    """Times every checkout from the pool's queue, including ones that time out.
+    
+    ``_do_get`` covers both waiting for a free connection and opening a new
+    one when the pool may grow; ``_create_connection`` is timed separately so
+    the two can be told apart in aggregate.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+    
+    def recreate(self):
+        # Pool recreation (e.g. engine.dispose()) keeps the counters
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started, timed_out=False)
+        return connection
+    
+    def _create_connection(self):
+        started = time.perf_counter()
+        connection = super()._create_connection()
+        self.metrics.record_connect(time.perf_counter() - started)
+        return connection
+    
+    def stats(self) -> Dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "timeout": self.timeout(),
+            **self.metrics.snapshot()
+        }
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_stats(pools: Dict) -> Dict:
+    """Stats for the named pools in this worker process"""
+    return {
+        "pid": os.getpid(),
+        "pools": {
+            name: pool.stats() if isinstance(pool, InstrumentedPoolMixin) else {"status": pool.status()}
+            for name, pool in pools.items()
+        }
+    }
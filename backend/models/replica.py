@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (pg_last_xact_replay_timestamp alone keeps growing while the primary is idle)
+LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE"
+        " WHEN NOT pg_is_in_recovery() THEN 0"
+        " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+        " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+        " END"
+    ),
+}
+
+def replica_lag_seconds(connection: Connection) -> float:
+    """Replication lag of the database behind connection (0.0 where lag doesn't apply, e.g. SQLite)"""
+    query = LAG_QUERIES.get(connection.dialect.name)
+    if query is None:
+        return 0.0
+    lag = connection.execute(query).scalar()
+    # NULL while a fresh replica hasn't replayed anything yet
+    return float(lag) if lag is not None else math.inf
+
+class ReplicaRouter:
+    """Hands out sessions for read-only work: the replica while it's healthy, else the primary.
+    
+    The lag check runs at most every ``check_interval`` seconds per process;
+    between checks the last verdict is reused.
+    """
+    
+    def __init__(self, primary: async_sessionmaker, replica: Optional[async_sessionmaker],
+                 max_lag: float, check_interval: float):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self._checked_at = -math.inf
+        self._lock = asyncio.Lock()
+    
+    def _is_fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < self.check_interval
+    
+    async def replica_healthy(self) -> bool:
+        if self.replica is None:
+            return False
+        if self._is_fresh():
+            return self.healthy
+        async with self._lock:
+            if self._is_fresh():
+                return self.healthy
+            try:
+                async with self.replica() as db:
+                    self.lag = await db.run_sync(lambda session: replica_lag_seconds(session.connection()))
+            except Exception:
+                logger.warning("Read replica unreachable; routing reads to the primary", exc_info=True)
+                self.lag = None
+                self.healthy = False
+            else:
+                was_healthy = self.healthy
+                self.healthy = self.lag <= self.max_lag
+                if was_healthy and not self.healthy:
+                    logger.warning("Read replica is %.1fs behind; routing reads to the primary", self.lag)
+            self._checked_at = time.monotonic()
+        return self.healthy
+    
+    async def sessionmaker(self) -> async_sessionmaker:
+        return self.replica if await self.replica_healthy() else self.primary
+
+def read_sessionmaker_for(primary: sessionmaker, replica: Optional[sessionmaker], max_lag: float) -> sessionmaker:
+    """Sync counterpart for scripts: checks lag once and picks the sessionmaker to read with"""
+    if replica is None:
+        return primary
+    try:
+        with replica() as db:
+            lag = replica_lag_seconds(db.connection())
+    except Exception:
+        logger.warning("Read replica unreachable; reading from the primary", exc_info=True)
+        return primary
+    if lag > max_lag:
+        logger.warning("Read replica is %.1fs behind; reading from the primary", lag)
+        return primary
+    return replica
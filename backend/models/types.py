@@ -0,0 +1,52 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+class NumpyArray(TypeDecorator):
+    """NumPy array stored as raw little-endian bytes (bytea on PostgreSQL, BLOB on SQLite).
+    
+    Values are written straight from the array buffer and read back with
+    ``np.frombuffer``, so there is no per-element text encoding and no
+    intermediate Python list in either direction. Loaded arrays are read-only
+    views of the fetched bytes; copy before modifying in place.
+    
+    ``shape`` reshapes loaded arrays (one dimension may be -1); ``square``
+    reshapes a flat n*n buffer into an n x n matrix.
+    """
+    
+    impl = LargeBinary
+    cache_ok = True
+    
+    def __init__(self, dtype: str = "<f4", shape: Optional[Tuple[int, ...]] = None, square: bool = False):
+        super().__init__()
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self.square = square
+    
+    def encode(self, value) -> Optional[bytes]:
+        if value is None:
+            return None
+        return np.ascontiguousarray(value, dtype=self.dtype).tobytes()
+    
+    def decode(self, raw) -> Optional[np.ndarray]:
+        if raw is None:
+            return None
+        array = np.frombuffer(raw, dtype=self.dtype)
+        if self.square:
+            side = math.isqrt(array.size)
+            return array.reshape(side, side)
+        return array.reshape(self.shape) if self.shape else array
+    
+    def process_bind_param(self, value, dialect):
+        return self.encode(value)
+    
+    def process_result_value(self, value, dialect):
+        return self.decode(value)
+    
+    def compare_values(self, x, y) -> bool:
+        # The default ``x == y`` is elementwise for arrays
+        if x is None or y is None:
+            return x is y
+        return np.array_equal(np.asarray(x), np.asarray(y))
@@ -0,0 +1,42 @@
+"""Export responses joined with sessions and questions as NDJSON or CSV.
+
+Streams through a server-side cursor, so memory stays flat for any table
+size. For incremental exports pass the previous run's --until as --since:
+
+    python scripts/export_responses.py --format csv --since 2026-01-01T00:00:00 -o responses.csv
+
+By default the window ends a little before now, so responses still being
+committed (or replicated) are left for the next run; the window end used is
+printed to stderr.
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.export import DEFAULT_YIELD_PER, EXPORT_FORMATS, default_until, export_responses
+from models import read_sessionmaker
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream responses as NDJSON or CSV")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="include responses at or after this time (UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="include responses before this time (UTC, default: the latest settled time)")
+    parser.add_argument("--yield-per", type=int, default=DEFAULT_YIELD_PER, help="rows fetched per batch")
+    parser.add_argument("-o", "--output", type=Path, help="output file (default stdout)")
+    args = parser.parse_args()
+    
+    until = args.until or default_until()
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    db = read_sessionmaker()()
+    try:
+        for chunk in export_responses(db, args.format, since=args.since, until=until, yield_per=args.yield_per):
+            output.write(chunk)
+    finally:
+        db.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Exported responses before {until.isoformat()}", file=sys.stderr)
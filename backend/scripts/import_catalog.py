@@ -0,0 +1,36 @@
+"""Bulk import questions or archetypes from a JSON array or NDJSON file.
+
+Items are streamed, validated in chunks and upserted by id, so re-running an
+import only rewrites the rows that changed:
+
+    python scripts/import_catalog.py archetypes catalog.ndjson --chunk-size 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.catalog_import import IMPORT_KINDS, import_file
+from models import SessionLocal
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk upsert questions or archetypes")
+    parser.add_argument("kind", choices=sorted(IMPORT_KINDS), help="what the file contains")
+    parser.add_argument("path", type=Path, help=".json array, or .ndjson / .jsonl with one item per line")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="items validated and written per batch")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = import_file(db, args.kind, args.path, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Imported {args.kind} in {time.perf_counter() - started:.1f}s: {result}")
+    for error in result.errors:
+        print(f"  {error}")
+    if result.invalid > len(result.errors):
+        print(f"  ... and {result.invalid - len(result.errors)} more invalid items")
@@ -0,0 +1,29 @@
+"""Refresh the match reports affected by edits to specific archetypes.
+
+Run after changing an archetype's vector, min_requirements or
+contraindications (or adding / removing archetypes):
+
+    python scripts/refresh_reports.py arch_001 arch_017
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.report_refresh import refresh_reports_for_archetypes
+from models import SessionLocal
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute match reports affected by archetype edits")
+    parser.add_argument("archetype_ids", nargs="+", help="IDs of the archetypes that changed")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="reports checked per batch")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        checked, rewritten = refresh_reports_for_archetypes(db, args.archetype_ids, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Checked {checked} reports, rewrote {rewritten}")
@@ -0,0 +1,142 @@
+"""Re-score every completed session against the current archetype catalog.
+
+Completed sessions are read in keyset-paginated chunks and each chunk is
+scored on a process pool, a block of archetypes at a time with a running
+top-k, so a task's memory doesn't grow with the catalog size. The
+catalog matrices are placed in shared memory once, so workers map them instead
+of receiving a pickled copy per task. Results are written back to
+``match_reports`` with a bulk upsert keyed on session_id.
+
+    python scripts/rescore_sessions.py --chunk-size 5000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from sqlalchemy import select
+
+from core.archetype_catalog import ArchetypeCatalog, read_archetype_catalog
+from core.match_reports import REPORT_COLUMNS, build_recommendations_batch
+from core.matching_engine import MatchingEngine
+from models import MatchReport, SessionLocal, Session as DBSession, read_sessionmaker
+from models.bulk import upsert_statement
+
+# Per-worker catalog, attached to shared memory by _init_worker
+_catalog = None
+_segments = []
+
+def _share(array: np.ndarray):
+    """Copy an array into a new shared memory block; returns (block, spec for workers)"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+def _attach(spec) -> np.ndarray:
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    # Keep a reference so the mapping outlives this call
+    _segments.append(block)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+def _init_worker(ids, names, vectors_spec, normalized_spec, constraints):
+    global _catalog
+    engine = MatchingEngine.from_arrays(ids, names, _attach(vectors_spec), _attach(normalized_spec))
+    _catalog = ArchetypeCatalog.from_parts(engine, constraints)
+
+def _score_chunk(session_ids, state_vectors, covariances):
+    """Worker task: match report rows for one chunk of sessions"""
+    results = build_recommendations_batch(_catalog, state_vectors, covariances)
+    return [
+        {
+            "session_id": session_id,
+            "recommendations": recommendations,
+            "confidence": confidence,
+            "average_uncertainty": average_uncertainty
+        }
+        for session_id, (recommendations, confidence, average_uncertainty) in zip(session_ids, results)
+    ]
+
+def _completed_chunks(db, chunk_size: int):
+    """(ids, state vectors, covariances) of completed sessions, chunk_size at a time.
+    
+    Keyset pagination on the primary key keeps each read short, so no
+    cursor stays open while the upserts for earlier chunks are committed.
+    """
+    last_id = None
+    while True:
+        query = select(DBSession.id, DBSession.state_vector, DBSession.covariance).where(DBSession.status == "completed")
+        if last_id is not None:
+            query = query.where(DBSession.id > last_id)
+        rows = db.execute(query.order_by(DBSession.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield tuple(zip(*rows))
+
+def _write_reports(db, statement, rows) -> int:
+    db.execute(statement, rows)
+    db.commit()
+    return len(rows)
+
+def rescore_sessions(chunk_size: int = 5000, workers: int = 0) -> int:
+    """Re-score all completed sessions; returns the number of reports written"""
+    workers = workers or os.cpu_count() or 1
+    # Sessions and the catalog are read from the replica when it's healthy; reports go to the primary
+    reader = read_sessionmaker()()
+    db = SessionLocal()
+    blocks = []
+    try:
+        catalog = read_archetype_catalog(reader)
+        if not len(catalog):
+            print("No archetypes in the catalog; nothing to score")
+            return 0
+        
+        vectors_block, vectors_spec = _share(np.ascontiguousarray(catalog.vectors))
+        blocks.append(vectors_block)
+        normalized_block, normalized_spec = _share(catalog.engine.normalized)
+        blocks.append(normalized_block)
+        
+        statement = upsert_statement(MatchReport, db.bind.dialect.name, ["session_id"], REPORT_COLUMNS)
+        written = 0
+        pending = set()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(catalog.ids, catalog.names, vectors_spec, normalized_spec, catalog.constraints)
+        ) as pool:
+            for session_ids, state_vectors, covariances in _completed_chunks(reader, chunk_size):
+                pending.add(pool.submit(_score_chunk, session_ids, state_vectors, covariances))
+                # Bound the number of chunks held in memory at once
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        written += _write_reports(db, statement, future.result())
+            for future in pending:
+                written += _write_reports(db, statement, future.result())
+        return written
+    finally:
+        reader.close()
+        db.close()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score completed sessions into match_reports")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="sessions per scoring task")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    written = rescore_sessions(chunk_size=args.chunk_size, workers=args.workers)
+    print(f"Re-scored {written} sessions in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Tests run against a throwaway SQLite file and the in-process Redis stand-in;
+# these must be set before config is imported
+TEST_DATABASE = Path(tempfile.gettempdir()) / f"orbit-test-{os.getpid()}.db"
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TEST_DATABASE}")
+os.environ.setdefault("REDIS_URL", "memory://")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+import pytest_asyncio
+
+@pytest.fixture
+def db_schema():
+    """Fresh tables for one test, dropped afterwards"""
+    from models import Base, engine
+    
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+@pytest_asyncio.fixture
+async def async_db(db_schema):
+    """AsyncSession factory on the test schema.
+    
+    The async engine's pool is disposed in the test's own event loop, which
+    also stops the aiosqlite worker threads that would otherwise keep the
+    interpreter alive after the run.
+    """
+    from models import AsyncSessionLocal, async_engine
+    
+    yield AsyncSessionLocal
+    await async_engine.dispose()
+
+@pytest.fixture
+def client(db_schema):
+    """Test client for the whole app on the seeded catalogs.
+    
+    Startup and shutdown hooks run as in production; the shutdown one
+    disposes the async engine inside the client's event loop.
+    """
+    from fastapi.testclient import TestClient
+    from core.archetype_catalog import archetype_catalog
+    from core.question_catalog import question_catalog
+    from main import app
+    from models import SessionLocal
+    from scripts.seed_data import seed_archetypes, seed_questions
+    
+    with SessionLocal() as db:
+        seed_questions(db)
+        seed_archetypes(db)
+    question_catalog.invalidate()
+    archetype_catalog.invalidate()
+    with TestClient(app) as client:
+        yield client
+    question_catalog.invalidate()
+    archetype_catalog.invalidate()
@@ -0,0 +1,29 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import admin
+from config import settings
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(admin.router)
+    return TestClient(app)
+
+def test_admin_routes_are_off_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.get("/admin/pool").status_code == 403
+    assert client.get("/admin/pool", headers={"Authorization": "Bearer "}).status_code == 403
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": "Basic s3cret"}])
+def test_admin_routes_reject_missing_or_wrong_tokens(client, monkeypatch, headers):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    response = client.get("/admin/export/responses", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+def test_admin_routes_accept_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    response = client.get("/admin/pool", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from core.bayesian import (
+    N_PARAMS, PRIOR_MEAN, GaussianPosterior, average_uncertainty, batch_update, normalize_answer, prior_covariance
+)
+
+def information_form(mean, covariance, measurements):
+    """Reference posterior: precision-weighted combination of prior and all answers at once"""
+    H = np.array([h for h, _, _ in measurements])
+    R_inv = np.diag([1.0 / noise for _, noise, _ in measurements])
+    y = np.array([observation for _, _, observation in measurements])
+    precision = np.linalg.inv(covariance) + H.T @ R_inv @ H
+    posterior_covariance = np.linalg.inv(precision)
+    posterior_mean = posterior_covariance @ (np.linalg.solve(covariance, mean) + H.T @ R_inv @ y)
+    return posterior_mean, posterior_covariance
+
+def random_measurements(rng, count):
+    return [(rng.random(N_PARAMS) * (rng.random(N_PARAMS) < 0.3), 0.05 * rng.uniform(0.5, 2.0), rng.random())
+            for _ in range(count)]
+
+def test_bayesian_update():
+    rng = np.random.default_rng(0)
+    measurements = random_measurements(rng, 12)
+    posterior = GaussianPosterior.prior()
+    for h, noise, observation in measurements:
+        posterior.update(h, noise, observation)
+    
+    mean, covariance = information_form(np.full(N_PARAMS, PRIOR_MEAN), prior_covariance(), measurements)
+    assert np.allclose(posterior.mean, mean)
+    assert np.allclose(posterior.covariance, covariance)
+    assert np.allclose(posterior.covariance, posterior.covariance.T)
+
+def test_update_moves_mean_towards_the_answer():
+    h = np.zeros(N_PARAMS)
+    h[3] = 1.0
+    posterior = GaussianPosterior.prior().update(h, 0.05, 0.9)
+    assert PRIOR_MEAN < posterior.mean[3] < 0.9
+    assert np.allclose(np.delete(posterior.mean, 3), PRIOR_MEAN)
+
+def test_from_state_without_state_is_the_prior():
+    posterior = GaussianPosterior.from_state(None, None)
+    assert np.array_equal(posterior.mean, np.full(N_PARAMS, PRIOR_MEAN))
+    assert np.array_equal(posterior.covariance, prior_covariance())
+
+def test_batch_update_matches_sequential_updates():
+    rng = np.random.default_rng(1)
+    measurements = random_measurements(rng, 6)
+    measurements[2] = (np.zeros(N_PARAMS), 0.05, 0.3)
+    start = [GaussianPosterior.prior().update(*measurement) for measurement in random_measurements(rng, 6)]
+    
+    means = np.array([posterior.mean for posterior in start])
+    covariances = np.array([posterior.covariance for posterior in start])
+    batch_update(means, covariances, np.array([h for h, _, _ in measurements]),
+                 np.array([noise for _, noise, _ in measurements]), np.array([y for _, _, y in measurements]))
+    
+    for posterior, measurement, mean, covariance in zip(start, measurements, means, covariances):
+        posterior.update(*measurement)
+        assert np.allclose(mean, posterior.mean)
+        assert np.allclose(covariance, posterior.covariance)
+    # A zero measurement row leaves that posterior unchanged
+    assert np.allclose(covariances[2], start[2].covariance)
+
+def test_uncertainty_calculation():
+    assert average_uncertainty(prior_covariance()) == pytest.approx(1.0)
+    assert average_uncertainty(prior_covariance() / 4) == pytest.approx(0.5)
+    assert GaussianPosterior.prior().update(np.ones(N_PARAMS), 0.05, 0.5).uncertainty() < 1.0
+
+@pytest.mark.parametrize("answer, expected", [(1, 0.0), (3, 0.5), (5, 1.0), ("4", 0.75), (7, 1.0), (0, 0.0)])
+def test_likert_normalization(answer, expected):
+    question = {"type": "likert", "options": [1, 2, 3, 4, 5]}
+    assert normalize_answer(question, answer) == pytest.approx(expected)
+
+def test_likert_normalization_without_signal():
+    assert normalize_answer({"type": "likert", "options": [1, 2, 3, 4, 5]}, "n/a") is None
+    # Default 1-5 scale when a likert question lists no options
+    assert normalize_answer({"type": "likert", "options": None}, 2) == pytest.approx(0.25)
+
+def test_other_question_types_normalization():
+    multiple_choice = {"type": "multiple_choice", "options": ["a", "b", "c"]}
+    assert [normalize_answer(multiple_choice, option) for option in "abc"] == [0.0, 0.5, 1.0]
+    assert normalize_answer(multiple_choice, "d") is None
+    assert normalize_answer({"type": "slider"}, 1.4) == 1.0
+    assert normalize_answer({"type": "free_text"}, "anything") is None
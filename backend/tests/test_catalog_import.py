@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+
+from core.catalog_cache import CatalogCache
+from core.catalog_import import QuestionItem, import_items, iter_json_array, iter_ndjson
+from core.question_catalog import load_question_catalog
+from models import Question, SessionLocal
+
+ITEMS = [{"id": f"qid_{i}", "text": "Pick one, \"quoted\" [brackets], {braces}", "options": [1, 2.5, "x"]} for i in range(50)]
+
+@pytest.mark.parametrize("read_size", [1, 7, 64, 1 << 16])
+def test_iter_json_array_matches_json_load(read_size):
+    document = json.dumps(ITEMS, indent=2)
+    assert list(iter_json_array(io.StringIO(document), read_size=read_size)) == ITEMS
+
+def test_iter_json_array_empty_and_scalars():
+    assert list(iter_json_array(io.StringIO("  [ ] "))) == []
+    assert list(iter_json_array(io.StringIO("[1, \"two\", null, [3]]"), read_size=2)) == [1, "two", None, [3]]
+
+def test_iter_json_array_rejects_non_arrays():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"id": "qid_1"}')))
+
+def test_iter_json_array_truncated():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"id": "qid_1"}, {"id": "qi'), read_size=4))
+
+def test_iter_ndjson_skips_blank_lines():
+    assert list(iter_ndjson(io.StringIO('{"a": 1}\n\n{"a": 2}\n'))) == [{"a": 1}, {"a": 2}]
+
+def test_question_options_keep_their_types():
+    likert = QuestionItem.model_validate({"id": "q", "text": "t", "type": "likert", "options": [1, 2, 3, 4, 5]})
+    assert likert.options == [1, 2, 3, 4, 5]
+    assert all(type(option) is int for option in likert.options)
+    
+    mixed = QuestionItem.model_validate({"id": "q", "text": "t", "type": "multiple_choice", "options": ["1", 0.5, 2]})
+    assert [type(option) for option in mixed.options] == [str, float, int]
+
+def question_items(text: str):
+    return [{"id": f"qid_{i}", "text": f"{text} {i}", "type": "slider"} for i in range(1, 7)]
+
+def test_import_moves_the_cache_watermark_with_every_chunk(db_schema):
+    with SessionLocal() as db:
+        import_items(db, "questions", question_items("Old"))
+    cache = CatalogCache(Question, load_question_catalog, refresh_interval=0)
+    snapshots = []
+    
+    def items():
+        for index, item in enumerate(question_items("New")):
+            if index and index % 2 == 0:
+                # A reader reloads the catalog between two committed chunks
+                with SessionLocal() as reader:
+                    snapshots.append(cache.get(reader))
+            yield item
+    
+    with SessionLocal() as db:
+        result = import_items(db, "questions", items(), chunk_size=2)
+    assert result.updated == 6
+    assert snapshots[0].get("qid_1")["text"] == "New 1" and snapshots[0].get("qid_3")["text"] == "Old 3"
+    
+    with SessionLocal() as reader:
+        catalog = cache.get(reader)
+    assert [catalog.get(f"qid_{i}")["text"] for i in range(1, 7)] == [f"New {i}" for i in range(1, 7)]
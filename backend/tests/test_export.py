@@ -0,0 +1,42 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from config import settings
+from core.export import EXPORT_COMMIT_MARGIN, default_until, export_responses
+from models import Question, Response, Session as DBSession, SessionLocal
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+def test_default_until_leaves_room_for_commits(monkeypatch):
+    monkeypatch.setattr(settings, "read_database_url", "")
+    assert default_until(NOW) == NOW - timedelta(seconds=EXPORT_COMMIT_MARGIN)
+
+def test_default_until_covers_replica_lag(monkeypatch):
+    monkeypatch.setattr(settings, "read_database_url", "postgresql://replica/orbit_db")
+    monkeypatch.setattr(settings, "replica_max_lag", 10.0)
+    monkeypatch.setattr(settings, "replica_check_interval", 5.0)
+    assert default_until(NOW) == NOW - timedelta(seconds=EXPORT_COMMIT_MARGIN + 15)
+
+def test_consecutive_windows_neither_skip_nor_repeat(db_schema):
+    with SessionLocal() as db:
+        db.add(Question(id="qid_1", text="One", type="slider"))
+        session = DBSession(answered_qids=["qid_1"])
+        db.add(session)
+        db.flush()
+        db.add_all(
+            Response(session_id=session.id, question_id="qid_1", payload={"answer": i / 10},
+                     timestamp=NOW + timedelta(seconds=i))
+            for i in range(10)
+        )
+        db.commit()
+        
+        boundary = NOW + timedelta(seconds=4)
+        windows = [
+            list(export_responses(db, since=None, until=boundary)),
+            list(export_responses(db, since=boundary, until=NOW + timedelta(minutes=1)))
+        ]
+    
+    exported = [json.loads(line) for chunks in windows for line in "".join(chunks).splitlines()]
+    assert [record["payload"]["answer"] for record in exported] == [i / 10 for i in range(10)]
+    assert len({uuid.UUID(record["response_id"]) for record in exported}) == 10
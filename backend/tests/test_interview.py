@@ -0,0 +1,97 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from starlette.websockets import WebSocketDisconnect
+
+import api.interview
+from core.session_store import session_store
+from models import Response, Session as DBSession, SessionLocal
+
+def first_option(question):
+    return question["options"][0] if question["options"] else 0.5
+
+def stored(session_id: str):
+    """(sessions row, number of responses rows) for a session"""
+    with SessionLocal() as db:
+        session = db.get(DBSession, uuid.UUID(session_id))
+        count = db.execute(select(func.count()).select_from(Response).where(Response.session_id == session.id)).scalar_one()
+        return session, count
+
+def wait_for_responses(session_id: str, count: int, timeout: float = 5.0) -> None:
+    """Let the background writer catch up before the test closes the socket"""
+    deadline = time.monotonic() + timeout
+    while stored(session_id)[1] < count:
+        assert time.monotonic() < deadline, f"only {stored(session_id)[1]} of {count} responses written"
+        time.sleep(0.01)
+
+def test_full_interview_over_websocket(client):
+    answered = []
+    with client.websocket_connect("/interview/ws?lookahead=true") as websocket:
+        message = websocket.receive_json()
+        while message["type"] == "question":
+            question = message["question"]
+            if question["type"] in ("multiple_choice", "likert"):
+                assert set(message["lookahead"]) == {str(option) for option in question["options"]}
+            answered.append(question["id"])
+            websocket.send_json({"question_id": question["id"], "answer": first_option(question)})
+            message = websocket.receive_json()
+    
+    assert message == {"type": "done", "session_id": message["session_id"], "reason": "no_more_questions"}
+    session, responses = stored(message["session_id"])
+    assert session.status == "completed" and session.answered_qids == answered
+    assert responses == len(answered) == 20
+    assert client.get(f"/session/{message['session_id']}/result").status_code == 200
+
+def test_websocket_resume_and_rest_fallback(client):
+    with client.websocket_connect("/interview/ws") as websocket:
+        for _ in range(3):
+            message = websocket.receive_json()
+            websocket.send_json({"question_id": message["question"]["id"], "answer": first_option(message["question"])})
+        message = websocket.receive_json()
+        session_id = message["session_id"]
+        wait_for_responses(session_id, 3)
+    assert message["question"]["id"] == "qid_4"
+    
+    # Reconnecting picks up at the first unanswered question
+    with client.websocket_connect(f"/interview/ws?session_id={session_id}") as websocket:
+        message = websocket.receive_json()
+        assert message["question"]["id"] == "qid_4"
+        websocket.send_json({"answers": [{"question_id": "qid_4", "answer": first_option(message["question"])}]})
+        assert websocket.receive_json()["question"]["id"] == "qid_5"
+        wait_for_responses(session_id, 4)
+    
+    # ... and so does plain REST
+    response = client.post("/response", json={"session_id": session_id, "question_id": "qid_5", "answer": 3})
+    assert response.json()["question"]["id"] == "qid_6"
+    assert stored(session_id)[1] == 5
+
+def test_unknown_session_is_refused(client):
+    with client.websocket_connect(f"/interview/ws?session_id={uuid.uuid4()}") as websocket:
+        assert websocket.receive_json() == {"type": "error", "status": 404, "detail": "Session not found"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == api.interview.CLOSE_SESSION_UNAVAILABLE
+
+def test_failed_response_insert_evicts_the_session(client, monkeypatch):
+    def failing_insert(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(api.interview, "insert_ignore_statement", failing_insert)
+    
+    with client.websocket_connect("/interview/ws") as websocket:
+        message = websocket.receive_json()
+        session_id = message["session_id"]
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                websocket.send_json({"question_id": message["question"]["id"], "answer": first_option(message["question"])})
+                message = websocket.receive_json()
+    assert closed.value.code == api.interview.CLOSE_INTERNAL_ERROR
+    
+    # The cache held answers with no responses rows; it is dropped rather than written behind
+    assert client.portal.call(session_store.get, session_id) is None
+    monkeypatch.undo()
+    response = client.post("/response", json={"session_id": session_id, "question_id": "qid_1", "answer": "Alone"})
+    assert response.json()["question"]["id"] == "qid_2"
+    session, responses = stored(session_id)
+    assert responses == 1
@@ -0,0 +1,238 @@
+import threading
+
+import numpy as np
+import pytest
+
+from config import settings
+from core.archetype_catalog import ArchetypeCatalog, attach_ann_index
+from core.catalog_cache import CatalogCache
+from core.matching_engine import ArchetypeConstraints, IVFIndex, MatchingEngine, compute_cosine_similarity
+from models import Archetype
+
+def make_engine(n: int, dims: int = 10, seed: int = 0) -> MatchingEngine:
+    vectors = np.random.default_rng(seed).random((n, dims))
+    ids = [f"arch_{row:05d}" for row in range(n)]
+    return MatchingEngine(ids, ids, vectors)
+
+def make_catalog(n: int, seed: int = 0) -> ArchetypeCatalog:
+    engine = make_engine(n, seed=seed)
+    return ArchetypeCatalog(engine.ids, engine.names, engine.vectors, [{}] * n, [{}] * n)
+
+def brute_force(engine: MatchingEngine, user_vector: np.ndarray, k=None, mask=None):
+    """Reference ranking: score each archetype on its own, stable sort descending"""
+    scored = [
+        (row, compute_cosine_similarity(user_vector, vector))
+        for row, vector in enumerate(engine.vectors)
+        if mask is None or mask[row]
+    ]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:k] if k is not None else scored
+
+@pytest.mark.parametrize("k", [None, 1, 5, 200])
+def test_top_k_matches_brute_force(k):
+    engine = make_engine(120, seed=4)
+    for user_vector in np.random.default_rng(5).random((10, 10)):
+        rows, scores = engine.top_k(user_vector, k)
+        expected = brute_force(engine, user_vector, k)
+        assert rows.tolist() == [row for row, _ in expected]
+        assert np.allclose(scores, [score for _, score in expected], atol=1e-6)
+
+def test_top_k_with_mask_matches_brute_force():
+    engine = make_engine(120, seed=6)
+    mask = np.random.default_rng(7).random(120) < 0.3
+    user_vector = np.random.default_rng(8).random(10)
+    rows, _ = engine.top_k(user_vector, 10, mask=mask)
+    assert rows.tolist() == [row for row, _ in brute_force(engine, user_vector, 10, mask)]
+    assert len(engine.top_k(user_vector, 10, mask=np.zeros(120, dtype=bool))[0]) == 0
+
+def test_top_k_ties_and_zero_vectors_keep_catalog_order():
+    vectors = np.array([[1.0, 0.0], [0.0, 0.0], [2.0, 0.0], [0.0, 1.0]])
+    engine = MatchingEngine(["a", "b", "c", "d"], ["A", "B", "C", "D"], vectors)
+    rows, scores = engine.top_k(np.array([1.0, 0.0]), 3)
+    assert rows.tolist() == [0, 2, 1] and scores.tolist() == [1.0, 1.0, 0.0]
+    # A zero user vector scores 0.0 against everything, as compute_cosine_similarity does
+    assert engine.top_k(np.zeros(2))[0].tolist() == [0, 1, 2, 3]
+
+def test_top_k_batch_matches_top_k():
+    engine = make_engine(60, seed=9)
+    user_vectors = np.random.default_rng(10).random((6, 10))
+    masks = np.random.default_rng(11).random((6, 60)) < 0.05
+    rows, scores = engine.top_k_batch(user_vectors, 4, masks)
+    for user_vector, mask, user_rows, user_scores in zip(user_vectors, masks, rows, scores):
+        expected_rows, expected_scores = engine.top_k(user_vector, 4, mask=mask)
+        # Slots past the eligible archetypes are padded with row -1 and score -inf
+        assert user_rows.tolist() == expected_rows.tolist() + [-1] * (4 - len(expected_rows))
+        assert np.allclose(user_scores[:len(expected_scores)], expected_scores)
+        assert np.all(np.isneginf(user_scores[len(expected_scores):]))
+
+@pytest.fixture
+def small_score_blocks(monkeypatch):
+    """Blocks of 7 archetypes, so top_k_batch merges across many of them"""
+    monkeypatch.setattr(MatchingEngine, "SCORE_BUDGET", 0)
+    monkeypatch.setattr(MatchingEngine, "MIN_SCORE_BLOCK", 7)
+
+@pytest.mark.parametrize("k", [1, 4, 10, 100])
+def test_blocked_top_k_batch_matches_top_k(small_score_blocks, k):
+    engine = make_engine(60, seed=17)
+    user_vectors = np.random.default_rng(18).random((8, 10))
+    masks = np.random.default_rng(19).random((8, 60)) < 0.3
+    
+    for rows, scores in (
+        engine.top_k_batch(user_vectors, k, masks),
+        engine.top_k_batch(user_vectors, k, eligible=lambda start, stop: masks[:, start:stop])
+    ):
+        for user_vector, mask, user_rows, user_scores in zip(user_vectors, masks, rows, scores):
+            expected_rows, expected_scores = engine.top_k(user_vector, k, mask=mask)
+            assert user_rows.tolist() == expected_rows.tolist() + [-1] * (min(k, 60) - len(expected_rows))
+            assert np.allclose(user_scores[:len(expected_scores)], expected_scores)
+
+def test_blocked_top_k_batch_keeps_catalog_order_on_ties(small_score_blocks):
+    # Every archetype scores the same, so the winners are the first rows of the first block
+    engine = MatchingEngine([str(row) for row in range(30)], [str(row) for row in range(30)], np.ones((30, 2)))
+    rows, _ = engine.top_k_batch(np.ones((2, 2)), 10)
+    assert rows.tolist() == [list(range(10))] * 2
+
+def dict_walk_eligible(user_vector, min_requirements, contraindications):
+    """Reference eligibility: check every archetype's constraint dicts one by one"""
+    eligible = []
+    for requirements, excluded in zip(min_requirements, contraindications):
+        ok = all(user_vector[int(param)] >= minimum for param, minimum in requirements.items())
+        ok = ok and all(
+            round(min(max(user_vector[int(param)], 0.0), 1.0) * 10) not in {round(value * 10) for value in values}
+            for param, values in excluded.items()
+        )
+        eligible.append(ok)
+    return np.array(eligible)
+
+def random_constraints(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    min_requirements = [
+        {str(param): round(float(rng.uniform(0.2, 0.8)), 2) for param in rng.choice(10, size=rng.integers(0, 3), replace=False)}
+        for _ in range(n)
+    ]
+    contraindications = [
+        {str(param): [round(float(value), 1) for value in rng.choice(11, size=2, replace=False) / 10]
+         for param in rng.choice(10, size=rng.integers(0, 2), replace=False)}
+        for _ in range(n)
+    ]
+    return min_requirements, contraindications
+
+def test_constraint_masks_match_dict_walk():
+    min_requirements, contraindications = random_constraints(80, seed=12)
+    constraints = ArchetypeConstraints(80, min_requirements, contraindications)
+    # Users on the 0.1 grid hit contraindications exactly; out-of-range values are clipped
+    user_vectors = np.vstack([
+        np.round(np.random.default_rng(13).random((20, 10)), 1),
+        np.random.default_rng(14).uniform(-0.2, 1.2, (20, 10))
+    ])
+    
+    masks = constraints.eligible(user_vectors)
+    assert masks.shape == (40, 80)
+    for user_vector, mask in zip(user_vectors, masks):
+        expected = dict_walk_eligible(user_vector, min_requirements, contraindications)
+        assert mask.tolist() == expected.tolist()
+        assert constraints.eligible(user_vector).tolist() == expected.tolist()
+
+def test_constraint_subset_keeps_only_those_rows():
+    min_requirements, contraindications = random_constraints(50, seed=15)
+    constraints = ArchetypeConstraints(50, min_requirements, contraindications)
+    rows = [41, 3, 17, 29]
+    user_vectors = np.round(np.random.default_rng(16).random((10, 10)), 1)
+    assert np.array_equal(constraints.subset(rows).eligible(user_vectors), constraints.eligible(user_vectors)[:, rows])
+
+def test_catalog_falls_back_to_everything_when_nothing_is_eligible():
+    catalog = ArchetypeCatalog(["a", "b"], ["A", "B"], np.eye(2, 10), [{"0": 0.9}, {"1": 0.9}], [{}, {}])
+    user_vector = np.full(10, 0.5)
+    assert catalog.eligible(user_vector) is None
+    assert catalog.eligible_batch(user_vector[None]).tolist() == [[True, True]]
+    assert [match["archetype_id"] for match in catalog.rank(np.array([0.95] + [0.5] * 9))] == ["a"]
+    assert not ArchetypeConstraints(2, [{}, {}], [{}, {}])
+
+def test_catalog_top_k_batch_matches_rank(small_score_blocks):
+    min_requirements, contraindications = random_constraints(60, seed=20)
+    min_requirements[:] = [{"0": 0.9, **requirements} for requirements in min_requirements]
+    engine = make_engine(60, seed=21)
+    catalog = ArchetypeCatalog(engine.ids, engine.names, engine.vectors, min_requirements, contraindications)
+    # The last user is eligible for nothing and is ranked against the whole catalog
+    user_vectors = np.vstack([np.round(np.random.default_rng(22).random((12, 10)), 1), np.zeros(10)])
+    user_vectors[:12, 0] = 0.95
+    
+    rows, _ = catalog.top_k_batch(user_vectors, 3)
+    for user_vector, user_rows in zip(user_vectors, rows):
+        expected = [catalog.row_of[match["archetype_id"]] for match in catalog.rank(user_vector, k=3)]
+        assert user_rows.tolist() == expected + [-1] * (3 - len(expected))
+
+def test_ivf_recall_rises_with_nprobe():
+    engine = make_engine(4000)
+    index = IVFIndex.build(engine.normalized, n_lists=32, seed=0)
+    queries = np.random.default_rng(1).random((50, 10))
+    
+    assert index.recall(engine.normalized, queries, k=10, nprobe=8) >= 0.9
+    assert index.recall(engine.normalized, queries, k=10, nprobe=32) == 1.0
+
+def test_ivf_exact_when_probing_every_list():
+    engine = make_engine(2000)
+    query = np.random.default_rng(2).random(10)
+    exact_rows, exact_scores = engine.top_k(query, 10)
+    
+    engine.build_ann_index(n_lists=16)
+    rows, scores = engine.top_k(query, 10, nprobe=16)
+    assert rows.tolist() == exact_rows.tolist()
+    assert np.allclose(scores, exact_scores)
+
+def test_ann_falls_back_to_brute_force_when_probed_lists_run_short():
+    engine = make_engine(2000)
+    query = np.random.default_rng(3).random(10)
+    engine.build_ann_index(n_lists=16)
+    # Only a handful of eligible rows, almost surely not all in the probed list
+    mask = np.zeros(len(engine), dtype=bool)
+    mask[::400] = True
+    
+    rows, _ = engine.top_k(query, 5, mask=mask, nprobe=1)
+    exact_rows, _ = engine.top_k(query, 5, mask=mask, exact=True)
+    assert rows.tolist() == exact_rows.tolist()
+
+def test_index_save_replaces_file_and_round_trips(tmp_path):
+    engine = make_engine(500)
+    index = engine.build_ann_index(n_lists=8)
+    path = tmp_path / "ann.idx"
+    path.write_bytes(b"previous")
+    
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert loaded.fingerprint == engine.fingerprint()
+    assert np.array_equal(loaded.rows, index.rows)
+    # Only the target is left behind, under its configured name
+    assert [entry.name for entry in tmp_path.iterdir()] == ["ann.idx"]
+
+@pytest.fixture
+def ann_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ann_min_catalog_size", 100)
+    monkeypatch.setattr(settings, "ann_n_lists", 4)
+    monkeypatch.setattr(settings, "ann_index_path", str(tmp_path / "ann.idx"))
+    return tmp_path / "ann.idx"
+
+@pytest.mark.parametrize("contents", [b"", b"PK\x03\x04truncated", b"not an index"])
+def test_unreadable_index_file_is_rebuilt(ann_settings, contents):
+    ann_settings.write_bytes(contents)
+    catalog = make_catalog(200)
+    
+    attach_ann_index(catalog)
+    assert catalog.engine.ann is not None
+    assert IVFIndex.load(ann_settings).fingerprint == catalog.engine.fingerprint()
+
+def test_stale_index_file_is_rebuilt(ann_settings):
+    attach_ann_index(make_catalog(200, seed=1))
+    catalog = make_catalog(200, seed=2)
+    
+    attach_ann_index(catalog)
+    assert catalog.engine.ann.fingerprint == catalog.engine.fingerprint()
+    assert IVFIndex.load(ann_settings).fingerprint == catalog.engine.fingerprint()
+
+@pytest.mark.asyncio
+async def test_catalog_cache_finishes_snapshots_off_the_event_loop(async_db):
+    finished_in = []
+    cache = CatalogCache(Archetype, lambda db: [], finish=lambda snapshot: finished_in.append(threading.current_thread()))
+    async with async_db() as db:
+        await cache.aget(db)
+    assert finished_in and finished_in[0] is not threading.main_thread()
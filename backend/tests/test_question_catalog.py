@@ -0,0 +1,54 @@
+import copy
+from datetime import datetime
+
+import pytest
+
+from api.response import AnswerItem, apply_answers
+from config import settings
+from core.question_catalog import QuestionCatalog
+from core.session_store import SessionState
+
+QUESTIONS = [
+    {"id": "qid_1", "text": "One", "type": "likert", "options": [1, 2, 3, 4, 5], "targets": [0, 1], "info_weight": [3.0, 3.0]},
+    {"id": "qid_2", "text": "Two", "type": "multiple_choice", "options": ["a", "b"], "targets": [0], "info_weight": [0.9]},
+    {"id": "qid_3", "text": "Three", "type": "slider", "options": None, "targets": [2], "info_weight": [0.8]},
+    {"id": "qid_4", "text": "Four", "type": "likert", "options": [1, 2, 3], "targets": [1], "info_weight": [0.6]},
+    {"id": "qid_5", "text": "Five", "type": "free_text", "options": None, "targets": None, "info_weight": None},
+    # Non-numeric likert options can't be normalized, so no answer to it carries signal
+    {"id": "qid_6", "text": "Six", "type": "likert", "options": ["low", "high"], "targets": [1], "info_weight": [0.5]}
+]
+
+@pytest.fixture
+def catalog():
+    return QuestionCatalog(QUESTIONS)
+
+def new_state() -> SessionState:
+    now = datetime.utcnow()
+    return SessionState(session_id="00000000-0000-0000-0000-000000000001", status="active", created_at=now,
+                        answered_qids=[], state_vector=None, covariance=None, updated_at=now)
+
+@pytest.mark.parametrize("selection", ["static", "adaptive"])
+@pytest.mark.parametrize("question_id", ["qid_1", "qid_2", "qid_6"])
+def test_lookahead_predicts_the_next_question_for_every_option(catalog, monkeypatch, selection, question_id):
+    monkeypatch.setattr(settings, "question_selection", selection)
+    state = new_state()
+    question = catalog.get(question_id)
+    
+    lookahead = catalog.lookahead(state.state_vector, state.covariance, state.answered_qids, question)
+    assert list(lookahead) == [str(option) for option in question["options"]]
+    for option in question["options"]:
+        answered = copy.deepcopy(state)
+        apply_answers(catalog, answered, [AnswerItem(question_id=question["id"], answer=option)])
+        expected = catalog.next_question(answered.covariance, answered.answered_qids, last_answered=question["id"])
+        assert lookahead[str(option)] == expected
+
+def test_adaptive_lookahead_follows_the_updated_covariance(catalog, monkeypatch):
+    monkeypatch.setattr(settings, "question_selection", "adaptive")
+    # qid_2 is the best question a priori, but answering qid_1 mostly settles its parameter
+    assert catalog.next_question(None, ["qid_1"])["id"] == "qid_2"
+    assert {question["id"] for question in catalog.lookahead(None, None, [], catalog.get("qid_1")).values()} == {"qid_3"}
+
+def test_lookahead_only_for_closed_form_questions(catalog):
+    state = new_state()
+    assert catalog.lookahead(state.state_vector, state.covariance, [], catalog.get("qid_3")) is None
+    assert catalog.lookahead(state.state_vector, state.covariance, [], catalog.get("qid_5")) is None
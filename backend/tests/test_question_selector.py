@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from core.bayesian import BASE_OBSERVATION_NOISE, GaussianPosterior, N_PARAMS, prior_covariance
+from core.question_selector import QuestionSelector
+
+def make_selector(seed: int = 0, n_questions: int = 30) -> QuestionSelector:
+    rng = np.random.default_rng(seed)
+    targets = [sorted(rng.choice(N_PARAMS, size=rng.integers(1, 4), replace=False).tolist()) for _ in range(n_questions)]
+    weights = [rng.uniform(0.2, 1.0, size=len(question_targets)).tolist() for question_targets in targets]
+    difficulties = rng.uniform(0.5, 2.0, size=n_questions).tolist()
+    return QuestionSelector([f"qid_{i + 1}" for i in range(n_questions)], targets, weights, difficulties)
+
+def random_covariance(seed: int) -> np.ndarray:
+    factor = np.random.default_rng(seed).normal(size=(N_PARAMS, N_PARAMS)) * 0.1
+    return factor @ factor.T + 0.01 * np.eye(N_PARAMS)
+
+def test_information_gain():
+    selector = make_selector()
+    covariance = random_covariance(1)
+    expected = [
+        0.5 * np.log(1 + h @ covariance @ h / noise)
+        for h, noise in (selector.measurement(question_id) for question_id in selector.ids)
+    ]
+    assert np.allclose(selector.information_gain(covariance), expected)
+
+def test_information_gain_batch():
+    selector = make_selector()
+    covariances = np.array([random_covariance(seed) for seed in range(4)])
+    gains = selector.information_gain(covariances)
+    assert gains.shape == (4, len(selector))
+    for covariance, row in zip(covariances, gains):
+        assert np.allclose(row, selector.information_gain(covariance))
+
+def test_information_gain_drops_after_answering():
+    selector = make_selector()
+    posterior = GaussianPosterior.prior()
+    before = selector.information_gain(posterior.covariance)
+    posterior.update(*selector.measurement("qid_1"), 0.7)
+    after = selector.information_gain(posterior.covariance)
+    assert np.all(after <= before + 1e-12)
+    assert after[0] < before[0]
+
+def test_measurement_noise_scales_with_difficulty():
+    selector = QuestionSelector(["qid_1", "qid_2", "qid_3"], [[0], [0], None], [[1.0], None, None], [1.0, 2.0, 0.0])
+    assert selector.measurement("qid_1")[1] == pytest.approx(BASE_OBSERVATION_NOISE)
+    assert selector.measurement("qid_2")[1] == pytest.approx(2 * BASE_OBSERVATION_NOISE)
+    # Missing weights default to 1.0; questions without targets measure nothing
+    assert np.array_equal(selector.measurement("qid_1")[0], selector.measurement("qid_2")[0])
+    assert not selector.measurement("qid_3")[0].any()
+
+def test_question_selection():
+    selector = make_selector()
+    covariance = random_covariance(2)
+    gains = selector.information_gain(covariance)
+    answered = [selector.ids[row] for row in np.argsort(-gains)[:3]]
+    
+    best = max((question_id for question_id in selector.ids if question_id not in answered),
+               key=lambda question_id: gains[selector.index[question_id]])
+    assert selector.select(covariance, answered) == best
+    ranked = selector.rank(covariance, answered)
+    assert ranked[0] == best and len(ranked) == len(selector) - 3
+    ranked_gains = [gains[selector.index[question_id]] for question_id in ranked]
+    assert ranked_gains == sorted(ranked_gains, reverse=True)
+    assert selector.rank(covariance, answered, k=5) == ranked[:5]
+
+def test_question_selection_ties_keep_the_static_order():
+    selector = QuestionSelector(["qid_1", "qid_2", "qid_3"], [[0], [1], [2]], [[1.0], [1.0], [1.0]], [1.0, 1.0, 1.0])
+    assert selector.select(None) == "qid_1"
+    assert selector.select(prior_covariance(), ["qid_1"]) == "qid_2"
+    assert selector.rank(None) == ["qid_1", "qid_2", "qid_3"]
+
+def test_question_selection_when_everything_is_answered():
+    selector = make_selector(n_questions=3)
+    assert selector.select(None, selector.ids) is None
+    assert selector.rank(None, selector.ids) == []
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from core.archetype_catalog import ArchetypeCatalog
+from core.bayesian import N_PARAMS
+from core.report_refresh import stale_reports
+
+IDS = ["a", "b", "c", "d", "e"]
+
+def make_catalog(min_requirements=None) -> ArchetypeCatalog:
+    vectors = np.eye(len(IDS), N_PARAMS)
+    return ArchetypeCatalog(
+        ids=IDS,
+        names=[archetype_id.upper() for archetype_id in IDS],
+        vectors=vectors,
+        min_requirements=min_requirements or [{} for _ in IDS],
+        contraindications=[{} for _ in IDS]
+    )
+
+def user(*weights) -> np.ndarray:
+    vector = np.zeros(N_PARAMS)
+    vector[:len(weights)] = weights
+    return vector
+
+def check(catalog, changed_ids, user_vector, stored_ids):
+    """stale_reports for one user, with the threshold taken from the current scores"""
+    scores = catalog.engine.score_batch(user_vector[None])[0]
+    stored_scores = [scores[catalog.row_of[archetype_id]] for archetype_id in stored_ids if archetype_id in catalog.row_of]
+    threshold = min(stored_scores) if len(stored_ids) >= 3 else -np.inf
+    return bool(stale_reports(catalog, changed_ids, user_vector[None], [stored_ids], np.array([threshold]))[0])
+
+def test_changed_archetype_in_report_is_stale():
+    catalog = make_catalog()
+    assert check(catalog, ["b"], user(0.9, 0.8, 0.7), ["a", "b", "c"])
+
+def test_changed_archetype_below_threshold_is_not_stale():
+    catalog = make_catalog()
+    assert not check(catalog, ["e"], user(0.9, 0.8, 0.7), ["a", "b", "c"])
+
+def test_changed_archetype_above_threshold_is_stale():
+    catalog = make_catalog()
+    assert check(catalog, ["d"], user(0.9, 0.8, 0.1, 0.7), ["a", "b", "c"])
+
+def test_unknown_stored_archetype_is_stale():
+    catalog = make_catalog()
+    assert check(catalog, [], user(0.9, 0.8, 0.7), ["a", "b", "gone"])
+
+@pytest.mark.parametrize("eligible", [True, False])
+def test_short_report_only_stale_when_changed_archetype_is_eligible(eligible):
+    # Only a and b are reachable for this user, so the report has fewer than 3 entries
+    requirements = [{}, {}, {"9": 0.5}, {"9": 0.5}, {"9": 0.5}]
+    requirements[4] = {} if eligible else {"9": 0.5}
+    catalog = make_catalog(requirements)
+    assert check(catalog, ["e"], user(0.9, 0.8), ["a", "b"]) is eligible
@@ -0,0 +1,57 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from core.archetype_catalog import read_archetype_catalog
+from core.bayesian import N_PARAMS
+from core.match_reports import build_recommendations
+from models import MatchReport, SessionLocal, Session as DBSession
+from scripts.rescore_sessions import rescore_sessions
+from scripts.seed_data import seed_archetypes
+
+@pytest.fixture
+def sessions(db_schema):
+    """Seeded archetypes plus completed sessions across the state space, and one active session"""
+    rng = np.random.default_rng(23)
+    rows = [
+        DBSession(
+            id=uuid.uuid4(),
+            state_vector=rng.random(N_PARAMS).astype(np.float32),
+            covariance=np.diag(rng.uniform(0.01, 0.2, N_PARAMS)).astype(np.float32),
+            status="completed"
+        )
+        for _ in range(25)
+    ]
+    # Grid values hit contraindications exactly; a session without signal is scored at the prior
+    rows[0].state_vector = np.round(rows[0].state_vector, 1)
+    rows.append(DBSession(id=uuid.uuid4(), status="completed"))
+    rows.append(DBSession(id=uuid.uuid4(), state_vector=np.zeros(N_PARAMS, dtype=np.float32), status="active"))
+    session_ids = [row.id for row in rows]
+    
+    with SessionLocal() as db:
+        seed_archetypes(db)
+        db.add_all(rows)
+        db.commit()
+    return session_ids
+
+def test_rescore_matches_build_recommendations_per_session(sessions):
+    assert rescore_sessions(chunk_size=4, workers=2) == len(sessions) - 1
+    
+    with SessionLocal() as db:
+        catalog = read_archetype_catalog(db)
+        reports = {report.session_id: report for report in db.query(MatchReport)}
+        assert set(reports) == set(sessions[:-1])
+        
+        for session in db.query(DBSession).filter(DBSession.status == "completed"):
+            expected, confidence, uncertainty = build_recommendations(catalog, session.state_vector, session.covariance)
+            report = reports[session.id]
+            assert [(match["rank"], match["archetype_id"]) for match in report.recommendations] == [
+                (match["rank"], match["archetype_id"]) for match in expected
+            ]
+            assert [match["fit_score"] for match in report.recommendations] == pytest.approx(
+                [match["fit_score"] for match in expected], abs=1e-6
+            )
+            assert [match["explanation"] for match in report.recommendations] == [match["explanation"] for match in expected]
+            assert report.confidence == pytest.approx(confidence)
+            assert report.average_uncertainty == pytest.approx(uncertainty)
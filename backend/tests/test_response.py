@@ -0,0 +1,200 @@
+import asyncio
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+import api.response
+from api.response import ResponseResponse
+from api.session import SessionStartResponse
+from core.question_catalog import question_catalog
+from core.session_store import session_store
+from models import Response, SessionLocal
+
+def start(client) -> str:
+    return client.post("/session/start").json()["session_id"]
+
+def cached(client, session_id: str):
+    return client.portal.call(session_store.get, session_id)
+
+def stored_rows(session_id: str):
+    """A session's responses rows in answer order, without ids and timestamps"""
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Response).where(Response.session_id == uuid.UUID(session_id)).order_by(Response.timestamp)
+        ).scalars()
+        return [(row.question_id, row.payload, row.latency_ms, row.idempotency_key) for row in rows]
+
+def first_option(question):
+    return question["options"][0] if question["options"] else 0.5
+
+def answer(question_id: str, value, **extra):
+    return {"question_id": question_id, "answer": value, "latency_ms": 1200, **extra}
+
+# One answer per seeded question, in flow order
+ANSWERS = [
+    answer("qid_1", "Alone"), answer("qid_2", 4), answer("qid_3", 0.7), answer("qid_4", "Analytical"),
+    answer("qid_5", 2), answer("qid_6", 0.2), answer("qid_7", 5), answer("qid_8", "Visual"),
+    answer("qid_9", 1), answer("qid_10", "Mastery"), answer("qid_11", "None"), answer("qid_12", 0.9),
+    answer("qid_13", 3), answer("qid_14", "Both"), answer("qid_15", 4), answer("qid_16", 0.4),
+    answer("qid_17", 2), answer("qid_18", "Auditory"), answer("qid_19", 0.1), answer("qid_20", "Improving")
+]
+
+@pytest.mark.parametrize("question_limit, answers, lookahead, reason", [
+    # Mid-interview, with a repeated answer and an idempotency key
+    (None, ANSWERS[:2] + [answer("qid_2", 5, idempotency_key="again")] + ANSWERS[2:4], True, None),
+    # Completes on the last question
+    (None, ANSWERS, False, "no_more_questions"),
+    # Crosses the question limit; answers past it are dropped
+    (6, ANSWERS[:8], True, "question_limit")
+])
+def test_batch_matches_one_by_one_submissions(client, monkeypatch, question_limit, answers, lookahead, reason):
+    if question_limit is not None:
+        monkeypatch.setattr(api.response, "QUESTION_LIMIT", question_limit)
+    params = {"lookahead": lookahead}
+    one_by_one, batched = start(client), start(client)
+    
+    replies = []
+    for item in answers:
+        response = client.post("/response", params=params, json={"session_id": one_by_one, **item})
+        if replies and replies[-1].get("done"):
+            assert response.status_code == 400
+            continue
+        replies.append(response.json())
+    assert replies[-1]["reason"] == reason and (replies[-1]["lookahead"] is not None) == (lookahead and not reason)
+    batch_reply = client.post("/response/batch", params=params, json={"session_id": batched, "answers": answers}).json()
+    
+    assert batch_reply.pop("accepted") == len(replies)
+    assert batch_reply == {**replies[-1], "session_id": batched if replies[-1].get("done") else None}
+    
+    sequential_state, batch_state = cached(client, one_by_one), cached(client, batched)
+    assert batch_state.status == sequential_state.status
+    assert batch_state.answered_qids == sequential_state.answered_qids
+    assert np.allclose(batch_state.state_vector, sequential_state.state_vector)
+    assert np.allclose(batch_state.covariance, sequential_state.covariance)
+    assert stored_rows(batched) == stored_rows(one_by_one)
+    assert len(stored_rows(batched)) == len(replies)
+
+def test_retried_submission_is_recorded_once(client):
+    session_id = start(client)
+    request = {"session_id": session_id, **answer("qid_1", "Alone", idempotency_key="k1")}
+    first = client.post("/response", json=request).json()
+    before = cached(client, session_id)
+    
+    retry = client.post("/response", json=request)
+    assert retry.status_code == 200 and retry.json() == first
+    after = cached(client, session_id)
+    assert after.answered_qids == before.answered_qids == ["qid_1"]
+    assert np.array_equal(after.state_vector, before.state_vector)
+    assert [row[0] for row in stored_rows(session_id)] == ["qid_1"]
+
+@pytest.fixture
+def interleaved_loads(monkeypatch):
+    """Every state read yields to the other requests, so concurrent submissions all read before any saves.
+    
+    Returns the list of save outcomes.
+    """
+    load, save = session_store.load, session_store.save
+    outcomes = []
+    
+    async def slow_load(db, session_id):
+        state = await load(db, session_id)
+        await asyncio.sleep(0.05)
+        return state
+    
+    async def recorded_save(state, dirty=True):
+        outcomes.append(await save(state, dirty=dirty))
+        return outcomes[-1]
+    
+    monkeypatch.setattr(session_store, "load", slow_load)
+    monkeypatch.setattr(session_store, "save", recorded_save)
+    return outcomes
+
+def post_concurrently(client, requests):
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        return list(pool.map(lambda request: client.post("/response", json=request), requests))
+
+def test_concurrent_submissions_all_apply_once(client, monkeypatch, interleaved_loads):
+    session_id = start(client)
+    version = cached(client, session_id).version
+    # Each request may lose the race to all the others before it saves
+    monkeypatch.setattr(api.response, "CAS_ATTEMPTS", 4)
+    
+    answers = ANSWERS[:4]
+    responses = post_concurrently(client, [{"session_id": session_id, **item} for item in answers])
+    assert [response.status_code for response in responses] == [200] * 4
+    assert False in interleaved_loads
+    
+    state = cached(client, session_id)
+    assert sorted(state.answered_qids) == sorted(item["question_id"] for item in answers)
+    assert state.version == version + len(answers)
+    assert sorted(row[0] for row in stored_rows(session_id)) == sorted(state.answered_qids)
+
+def test_concurrent_retries_store_one_row(client, interleaved_loads):
+    session_id = start(client)
+    request = {"session_id": session_id, **answer("qid_1", "Alone", idempotency_key="k1")}
+    responses = post_concurrently(client, [request] * 3)
+    assert [response.status_code for response in responses] == [200] * 3
+    
+    assert cached(client, session_id).answered_qids == ["qid_1"]
+    assert len(stored_rows(session_id)) == 1
+
+def test_conflict_after_cas_attempts_run_out(client, monkeypatch):
+    session_id = start(client)
+    before = cached(client, session_id)
+    attempts = []
+    
+    async def always_stale(state, dirty=True):
+        attempts.append(state.version)
+        return False
+    
+    monkeypatch.setattr(session_store, "save", always_stale)
+    response = client.post("/response", json={"session_id": session_id, **answer("qid_1", "Alone")})
+    assert response.status_code == 409
+    assert len(attempts) == api.response.CAS_ATTEMPTS
+    
+    # Nothing was applied or recorded
+    monkeypatch.undo()
+    after = cached(client, session_id)
+    assert after.version == before.version and after.answered_qids == []
+    assert stored_rows(session_id) == []
+
+def rendered_by_response_model(model, body: bytes) -> bytes:
+    """The reply FastAPI would render through ``model`` for the same full catalog questions"""
+    with SessionLocal() as db:
+        catalog = question_catalog.get(db)
+    result = json.loads(body)
+    if result.get("question") is not None:
+        result["question"] = catalog.get(result["question"]["id"])
+    if result.get("lookahead") is not None:
+        result["lookahead"] = {
+            key: catalog.get(question["id"]) if question is not None else None
+            for key, question in result["lookahead"].items()
+        }
+    return JSONResponse(jsonable_encoder(model.model_validate(result))).body
+
+def test_question_replies_render_as_their_response_model(client):
+    start_reply = client.post("/session/start", params={"lookahead": True})
+    assert start_reply.json()["lookahead"]
+    assert start_reply.content == rendered_by_response_model(SessionStartResponse, start_reply.content)
+    
+    session_id = start_reply.json()["session_id"]
+    question = start_reply.json()["question"]
+    response_reply = client.post("/response", params={"lookahead": True}, json={
+        "session_id": session_id, **answer(question["id"], first_option(question))
+    })
+    assert response_reply.json()["question"] and response_reply.json()["lookahead"]
+    assert response_reply.content == rendered_by_response_model(ResponseResponse, response_reply.content)
+
+def test_lookahead_into_the_question_limit_renders_as_its_response_model(client, monkeypatch):
+    # Whatever the second answer is, it completes the session: every lookahead entry is null
+    monkeypatch.setattr(api.response, "QUESTION_LIMIT", 2)
+    session_id = start(client)
+    reply = client.post("/response", params={"lookahead": True}, json={"session_id": session_id, **ANSWERS[0]})
+    assert set(reply.json()["lookahead"].values()) == {None}
+    assert reply.content == rendered_by_response_model(ResponseResponse, reply.content)
@@ -0,0 +1,127 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from api.response import AnswerItem, apply_answers
+from core.question_catalog import question_catalog
+from core.session_store import InMemoryRedis, SessionState, SessionStore
+from models import Question, Response, Session as DBSession, SessionLocal
+
+QUESTIONS = [
+    {"id": "qid_1", "text": "One", "type": "likert", "options": [1, 2, 3, 4, 5], "targets": [0, 1], "info_weight": [1.0, 0.5]},
+    {"id": "qid_2", "text": "Two", "type": "multiple_choice", "options": ["a", "b", "c"], "targets": [2], "info_weight": [1.0]},
+    {"id": "qid_3", "text": "Three", "type": "free_text", "options": None, "targets": [3], "info_weight": [1.0]},
+    {"id": "qid_4", "text": "Four", "type": "slider", "options": None, "targets": [0, 4], "info_weight": [0.8, 0.8]}
+]
+
+@pytest.fixture
+def seeded(db_schema):
+    """Question bank plus one active session that has answered qid_1"""
+    question_catalog.invalidate()
+    with SessionLocal() as db:
+        db.add_all(Question(**question) for question in QUESTIONS)
+        session = DBSession(answered_qids=[])
+        db.add(session)
+        db.commit()
+        session_id = str(session.id)
+    yield session_id
+    question_catalog.invalidate()
+
+@pytest.mark.asyncio
+async def test_recover_replays_unflushed_answers(seeded, async_db):
+    with SessionLocal() as db:
+        catalog = question_catalog.get(db)
+        session = db.get(DBSession, uuid.UUID(seeded))
+        
+        # qid_1 was flushed to the session row; the rest only exist as responses
+        flushed = SessionState.from_row(session)
+        apply_answers(catalog, flushed, [AnswerItem(question_id="qid_1", answer=4)])
+        session.state_vector, session.covariance = flushed.state_vector, flushed.covariance
+        session.answered_qids = list(flushed.answered_qids)
+        
+        expected = SessionState.from_row(session)
+        rows = apply_answers(catalog, expected, [
+            AnswerItem(question_id="qid_1", answer=4),
+            AnswerItem(question_id="qid_2", answer="c"),
+            AnswerItem(question_id="qid_3", answer="free text"),
+            AnswerItem(question_id="qid_2", answer="a"),
+            AnswerItem(question_id="qid_4", answer=0.25)
+        ])
+        db.add_all(Response(**row) for row in rows)
+        db.commit()
+    
+    store = SessionStore(InMemoryRedis())
+    async with async_db() as db:
+        state = await store.recover(db, seeded)
+    
+    # Same posterior as answering live: repeats and qid_1's flushed answer count once
+    assert state.answered_qids == ["qid_1", "qid_2", "qid_3", "qid_4"]
+    assert np.allclose(state.state_vector, expected.state_vector, atol=1e-6)
+    assert np.allclose(state.covariance, expected.covariance, atol=1e-6)
+    assert not np.allclose(state.covariance, flushed.covariance)
+    assert await store.get(seeded) is not None
+
+@pytest.mark.asyncio
+async def test_recover_without_responses_keeps_row_state(seeded, async_db):
+    store = SessionStore(InMemoryRedis())
+    async with async_db() as db:
+        state = await store.recover(db, seeded)
+        assert await store.recover(db, str(uuid.uuid4())) is None
+    
+    assert state.answered_qids == []
+    assert state.state_vector is None and state.covariance is None
+
+@pytest.mark.asyncio
+async def test_add_only_caches_sessions_that_are_not_cached_yet(seeded, async_db):
+    store = SessionStore(InMemoryRedis())
+    async with async_db() as db:
+        state = await store.recover(db, seeded)
+    
+    other = SessionState.from_json(state.to_json())
+    other.answered_qids.append("qid_1")
+    assert not await store.add(other)
+    assert (await store.get(seeded)).answered_qids == []
+
+@pytest.mark.asyncio
+async def test_save_is_compare_and_set_on_version(seeded, async_db):
+    store = SessionStore(InMemoryRedis())
+    async with async_db() as db:
+        state = await store.recover(db, seeded)
+    first, second = SessionState.from_json(state.to_json()), SessionState.from_json(state.to_json())
+    
+    first.answered_qids.append("qid_1")
+    assert await store.save(first)
+    assert first.version == state.version + 1
+    # Read before the first save landed: rejected, and its version is left as it was
+    second.answered_qids.append("qid_2")
+    assert not await store.save(second)
+    assert second.version == state.version
+    assert (await store.get(seeded)).answered_qids == ["qid_1"]
+    
+    # An evicted session can't be resurrected by a save either
+    await store.evict(seeded)
+    assert not await store.save(first)
+    assert await store.get(seeded) is None
+
+@pytest.mark.asyncio
+async def test_flush_dirty_writes_behind_without_going_backwards(seeded, async_db):
+    store = SessionStore(InMemoryRedis())
+    async with async_db() as db:
+        state = await store.recover(db, seeded)
+    stale = SessionState.from_json(state.to_json())
+    
+    state.answered_qids.append("qid_1")
+    assert await store.save(state)
+    assert await store.flush_dirty() == 1
+    assert await store.flush_dirty() == 0
+    with SessionLocal() as db:
+        row = db.get(DBSession, uuid.UUID(seeded))
+        assert (row.answered_qids, row.version) == (["qid_1"], state.version)
+    
+    # An older state flushed late (e.g. by another worker) doesn't overwrite the row
+    async with async_db() as db:
+        await store.flush(db, [stale])
+        await db.commit()
+    with SessionLocal() as db:
+        assert db.get(DBSession, uuid.UUID(seeded)).answered_qids == ["qid_1"]
@@ -1,15 +1,24 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useMutation } from '@tanstack/react-query';
 import { QuestionDisplay } from './components/QuestionDisplay';
 import { ResultsPage } from './components/ResultsPage';
 import { sessionApi } from './utils/api';
-import { Question, ResponseResponse, ResultResponse } from './types';
+import { Lookahead, Question, ResponseResponse, ResultResponse } from './types';
 
 const App: React.FC = () => {
   const [sessionId, setSessionId] = useState<string | null>(null);
   const [currentQuestion, setCurrentQuestion] = useState<Question | null>(null);
   const [isComplete, setIsComplete] = useState(false);
   const [result, setResult] = useState<ResultResponse | null>(null);
+  // Predicted next question per answer to the current one, and whether the question shown is such a prediction
+  const [lookahead, setLookahead] = useState<Lookahead | null>(null);
+  const [isSpeculative, setIsSpeculative] = useState(false);
+  // When the current question was shown, for reporting answer latency
+  const questionShownAt = useRef<number>(0);
+
+  useEffect(() => {
+    questionShownAt.current = performance.now();
+  }, [currentQuestion]);
 
   // Start session mutation
   const startSessionMutation = useMutation({
@@ -18,6 +27,7 @@ const App: React.FC = () => {
       console.log('Session started successfully!', data);
       setSessionId(data.session_id);
       setCurrentQuestion(data.question);
+      setLookahead(data.lookahead ?? null);
     },
     onError: (error: any) => {
       console.error('Failed to start session:', error);
@@ -35,9 +45,11 @@ const App: React.FC = () => {
 
   // Submit response mutation
   const submitResponseMutation = useMutation({
-    mutationFn: ({ sessionId, questionId, answer }: { sessionId: string; questionId: string; answer: string | number }) =>
-      sessionApi.submitResponse(sessionId, questionId, answer),
+    mutationFn: ({ sessionId, question, answer, latencyMs, idempotencyKey }: { sessionId: string; question: Question; answer: string | number; latencyMs?: number; idempotencyKey: string }) =>
+      sessionApi.submitResponse(sessionId, question.id, answer, latencyMs, idempotencyKey),
     onSuccess: (data: ResponseResponse) => {
+      setIsSpeculative(false);
+      setLookahead(data.lookahead ?? null);
       if (data.done) {
         setIsComplete(true);
         // Fetch results
@@ -45,10 +57,15 @@ const App: React.FC = () => {
           fetchResult(data.session_id);
         }
       } else if (data.question) {
-        setCurrentQuestion(data.question);
+        // Keep the predicted question (and its timer) if the server confirmed it
+        const confirmed = data.question;
+        setCurrentQuestion((shown) => (shown?.id === confirmed.id ? shown : confirmed));
       }
     },
-    onError: (error: any) => {
+    onError: (error: any, variables) => {
+      // Roll back to the question that was being answered
+      setIsSpeculative(false);
+      setCurrentQuestion(variables.question);
       console.error('Failed to submit response:', error);
       const errorMessage = error.response?.data?.detail || error.message || 'Failed to submit answer. Please try again.';
       alert(`Error: ${errorMessage}`);
@@ -86,9 +103,20 @@ const App: React.FC = () => {
     
     submitResponseMutation.mutate({
       sessionId,
-      questionId: currentQuestion.id,
+      question: currentQuestion,
       answer,
+      latencyMs: Math.round(performance.now() - questionShownAt.current),
+      // Mutation retries reuse these variables, so a retried answer keeps its key
+      idempotencyKey: crypto.randomUUID(),
     });
+    
+    // Show the predicted next question right away; the response confirms or replaces it
+    const predicted = lookahead?.[String(answer)];
+    if (predicted) {
+      setCurrentQuestion(predicted);
+      setIsSpeculative(true);
+    }
+    setLookahead(null);
   };
 
   // Initial state - show start button
@@ -120,7 +148,7 @@ const App: React.FC = () => {
   }
 
   // Loading state
-  if (startSessionMutation.isPending || submitResponseMutation.isPending) {
+  if (startSessionMutation.isPending || (submitResponseMutation.isPending && !isSpeculative)) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-gray-50">
         <div className="text-center">
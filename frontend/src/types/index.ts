@@ -5,15 +5,34 @@ export interface Question {
   options?: string[] | number[];
 }
 
+// Next question per possible answer (keyed by String(option)); null means that answer ends the interview
+export type Lookahead = Record<string, Question | null>;
+
 export interface SessionStartResponse {
   session_id: string;
   question: Question;
+  lookahead?: Lookahead;
 }
 
 export interface ResponseRequest {
   session_id: string;
   question_id: string;
   answer: string | number | null;
+  latency_ms?: number;
+  idempotency_key?: string;
+}
+
+export interface AnswerItem {
+  question_id: string;
+  answer: string | number;
+  latency_ms?: number;
+  // Reused when the same answer is resubmitted, so the server records it once
+  idempotency_key?: string;
+}
+
+export interface BatchResponseRequest {
+  session_id: string;
+  answers: AnswerItem[];
 }
 
 export interface ResponseResponse {
@@ -21,6 +40,8 @@ export interface ResponseResponse {
   done?: boolean;
   session_id?: string;
   reason?: string;
+  accepted?: number;
+  lookahead?: Lookahead;
 }
 
 export interface MatchRecommendation {
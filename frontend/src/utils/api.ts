@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { AnswerItem } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -35,15 +36,26 @@ apiClient.interceptors.response.use(
 
 export const sessionApi = {
   start: async () => {
-    const response = await apiClient.post('/session/start');
+    const response = await apiClient.post('/session/start', null, { params: { lookahead: true } });
     return response.data;
   },
   
-  submitResponse: async (sessionId: string, questionId: string, answer: string | number) => {
+  submitResponse: async (sessionId: string, questionId: string, answer: string | number, latencyMs?: number, idempotencyKey?: string) => {
     const response = await apiClient.post('/response', {
       session_id: sessionId,
       question_id: questionId,
       answer: answer,
+      latency_ms: latencyMs,
+      idempotency_key: idempotencyKey,
+    }, { params: { lookahead: true } });
+    return response.data;
+  },
+  
+  // Replay answers queued while offline, in the order they were given
+  submitResponses: async (sessionId: string, answers: AnswerItem[]) => {
+    const response = await apiClient.post('/response/batch', {
+      session_id: sessionId,
+      answers,
     });
     return response.data;
   },